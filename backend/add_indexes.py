@@ -6,6 +6,7 @@ Run this once after setting up the database
 from models import Base, Poll, Option, Vote, Bookmark, Comment, Tag
 from models.database import engine
 from sqlalchemy import text
+from services.search import create_sqlite_fts
 
 def add_indexes():
     """Add indexes to improve query performance"""
@@ -50,6 +51,37 @@ def add_indexes():
             """))
             print("✓ Created index on poll_tags(tag_id, poll_id)")
             
+            # Keyset pagination indexes: (created_at, id) matches the listing order,
+            # with id as the tie-breaker that keeps cursors stable
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_polls_created_id 
+                ON polls(created_at DESC, id DESC);
+            """))
+            print("✓ Created index on polls(created_at, id)")
+            
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_polls_creator_created_id 
+                ON polls(creator_id, created_at DESC, id DESC);
+            """))
+            print("✓ Created index on polls(creator_id, created_at, id)")
+            
+            # Bookmarks pages are read newest-bookmark first per user or anonymous session
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_bookmarks_user_created_id 
+                ON bookmarks(user_id, created_at DESC, id DESC);
+            """))
+            print("✓ Created index on bookmarks(user_id, created_at, id)")
+            
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_bookmarks_session_created_id 
+                ON bookmarks(client_session_id, created_at DESC, id DESC);
+            """))
+            print("✓ Created index on bookmarks(client_session_id, created_at, id)")
+            
+            # No query scans votes by created_at across polls; drop it where an earlier run created it
+            conn.execute(text("DROP INDEX IF EXISTS idx_votes_created_poll;"))
+            print("✓ Dropped unused index on votes(created_at, poll_id)")
+            
             # Index for full-text search on polls (PostgreSQL specific)
             # Note: This uses PostgreSQL's GIN index for full-text search
             try:
@@ -67,6 +99,12 @@ def add_indexes():
         except Exception as e:
             print(f"❌ Error creating indexes: {e}")
             conn.rollback()
+    
+    # SQLite fallback: FTS5 table kept in sync by triggers
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            if create_sqlite_fts(conn):
+                print("✓ Created SQLite FTS5 search index on polls")
 
 if __name__ == "__main__":
     print("Adding database indexes for optimization...\n")
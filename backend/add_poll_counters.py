@@ -0,0 +1,49 @@
+"""
+Migration script - Adds denormalized total_votes/bookmark_count and version columns to polls
+Run this once after deploying the Poll counter columns; safe to re-run to resync counts
+"""
+
+from models.database import engine
+from sqlalchemy import inspect, text
+
+COUNTER_COLUMNS = ["total_votes", "bookmark_count", "version"]
+
+def add_poll_counters():
+    """Add the counter and version columns if missing and backfill counts from votes/bookmarks"""
+    existing = {column["name"] for column in inspect(engine).get_columns("polls")}
+    with engine.connect() as conn:
+        try:
+            for column in COUNTER_COLUMNS:
+                if column in existing:
+                    print(f"✓ polls.{column} already exists")
+                    continue
+                conn.execute(text(f"ALTER TABLE polls ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0;"))
+                print(f"✓ Added polls.{column}")
+
+            # Recount from the source tables so counters start out exact; bumping the
+            # version invalidates ETags issued for the old counts
+            conn.execute(text("""
+                UPDATE polls SET
+                    total_votes = (SELECT COUNT(*) FROM votes WHERE votes.poll_id = polls.id),
+                    bookmark_count = (SELECT COUNT(*) FROM bookmarks WHERE bookmarks.poll_id = polls.id),
+                    version = version + 1;
+            """))
+            print("✓ Backfilled total_votes and bookmark_count")
+
+            # most_voted keyset pagination reads this index instead of aggregating votes
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_polls_total_votes_id
+                ON polls(total_votes DESC, id DESC);
+            """))
+            print("✓ Created index on polls(total_votes, id)")
+
+            conn.commit()
+            print("\n✅ Poll counters are up to date!")
+
+        except Exception as e:
+            print(f"❌ Error adding poll counters: {e}")
+            conn.rollback()
+
+if __name__ == "__main__":
+    print("Adding denormalized poll counters...\n")
+    add_poll_counters()
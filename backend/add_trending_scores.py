@@ -0,0 +1,52 @@
+"""
+Migration script - Adds the materialized trending score to polls
+Run this once after add_vote_rollups.py; re-running recomputes every score from scratch
+"""
+
+from models import Base, TrendingState
+from models.database import engine, SessionLocal
+from services.trending import refresh_trending_scores
+from sqlalchemy import inspect, text
+
+def add_trending_scores():
+    """Add polls.trending_score and its index, then rebuild scores from minute rollups"""
+    Base.metadata.create_all(bind=engine, tables=[TrendingState.__table__])
+    existing = {column["name"] for column in inspect(engine).get_columns("polls")}
+    with engine.connect() as conn:
+        try:
+            if "trending_score" in existing:
+                print("✓ polls.trending_score already exists")
+            else:
+                conn.execute(text("ALTER TABLE polls ADD COLUMN trending_score DOUBLE PRECISION NOT NULL DEFAULT 0;"))
+                print("✓ Added polls.trending_score")
+
+            # Trending pages are a range scan on this index
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_polls_trending_id
+                ON polls(trending_score DESC, id DESC);
+            """))
+            print("✓ Created index on polls(trending_score, id)")
+
+            # Reset so the refresh below folds in every minute bucket
+            conn.execute(text("UPDATE polls SET trending_score = 0;"))
+            conn.execute(text("DELETE FROM trending_state;"))
+            conn.commit()
+        except Exception as e:
+            print(f"❌ Error adding trending score column: {e}")
+            conn.rollback()
+            return
+
+    db = SessionLocal()
+    try:
+        updated = refresh_trending_scores(db)
+        print(f"✓ Computed trending scores for {updated} polls")
+        print("\n✅ Trending scores are ready!")
+    except Exception as e:
+        print(f"❌ Error computing trending scores: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("Adding materialized trending scores...\n")
+    add_trending_scores()
@@ -0,0 +1,60 @@
+"""
+Create the vote_rollups table and backfill it from existing votes
+Run this once after deploying the rollup-backed timeseries endpoint (safe to re-run, also
+while votes are coming in: the rebuild holds off vote writes until it commits)
+"""
+
+from sqlalchemy import cast, func, literal, literal_column, select, text, Integer
+
+from models import Vote, VoteRollup
+from models.database import engine
+from services.rollups import ROLLUP_GRANULARITIES
+
+def bucket_start_sql(dialect: str, width: int):
+    """SQL for the start of the width-second bucket holding Vote.created_at, as bucket_floor computes it"""
+    # Inline width: PostgreSQL only matches the GROUP BY expression if it has no parameters
+    width = literal_column(str(width))
+    if dialect == "postgresql":
+        epoch = func.floor(func.extract("epoch", Vote.created_at) / width) * width
+        return func.to_timestamp(epoch)
+    # SQLite keeps datetimes as UTC text in SQLAlchemy's storage format
+    epoch = cast(func.strftime("%s", Vote.created_at), Integer) // width * width
+    return func.datetime(epoch, "unixepoch") + literal(".000000")
+
+def add_vote_rollups():
+    """Rebuild every rollup bucket from the votes table in one transaction"""
+    VoteRollup.__table__.create(engine, checkfirst=True)
+    print("✓ vote_rollups table ready")
+
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        try:
+            if dialect == "postgresql":
+                # Waits for in-flight vote transactions and blocks new ones until commit, so
+                # every vote is counted exactly once: by the rebuild or by its own upsert after it
+                conn.execute(text("LOCK TABLE votes IN SHARE MODE"))
+
+            conn.execute(VoteRollup.__table__.delete())
+            columns = ["poll_id", "granularity", "bucket_start", "option_id", "vote_count"]
+            for name, width in ROLLUP_GRANULARITIES:
+                bucket_start = bucket_start_sql(dialect, width)
+                buckets = select(
+                    Vote.poll_id,
+                    literal(name),
+                    bucket_start,
+                    Vote.option_id,
+                    func.count(),
+                ).group_by(Vote.poll_id, bucket_start, Vote.option_id)
+                result = conn.execute(VoteRollup.__table__.insert().from_select(columns, buckets))
+                print(f"✓ Rebuilt {result.rowcount} {name} buckets")
+
+            conn.commit()
+            print("\n✅ Vote rollups backfilled successfully!")
+
+        except Exception as e:
+            print(f"❌ Error backfilling vote rollups: {e}")
+            conn.rollback()
+
+if __name__ == "__main__":
+    print("Backfilling vote rollups...\n")
+    add_vote_rollups()
@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from uuid import UUID
 
@@ -11,7 +11,7 @@ security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
     """
     Get current user from JWT token.
@@ -31,9 +31,8 @@ async def get_current_user(
         return None
     
     try:
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
-        return user
-    except:
+        return await db.get(User, UUID(user_id))
+    except Exception:  # Never swallow cancellation of the request task
         return None
 
 async def get_current_user_required(
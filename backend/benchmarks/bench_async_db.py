@@ -0,0 +1,116 @@
+"""
+Benchmark: concurrent get_poll throughput, blocking session vs the async session
+Usage: DATABASE_URL=<scratch database> python benchmarks/bench_async_db.py [concurrency] [requests] [latency_ms]
+Serves `requests` get_poll calls, `concurrency` at a time, on one event loop. The previous
+handler ran the same statements on a sync Session inside `async def`, so every database
+wait stalled the loop; latency_ms adds a server-side sleep to each request to stand in for
+network round trips and slow queries. Seeds 'bench:' polls (see bench_get_poll) and deletes
+them afterwards.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from sqlalchemy import event, exists, false, text
+from sqlalchemy.orm import joinedload, selectinload
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_get_poll import seed, cleanup
+from models import init_db, User, Poll, Vote, Bookmark
+from models.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from routers.polls import get_poll
+from services.poll_lists import caller_filters
+from services.serialization import FastJSONResponse, poll_payload
+
+def install_sleep(latency_ms: float):
+    """SQL that sleeps latency_ms inside the database; SQLite gets a bench_sleep() function"""
+    if engine.dialect.name == "postgresql":
+        return text(f"SELECT pg_sleep({latency_ms / 1000.0})")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000.0))
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "connect", register)
+        target.dispose()
+    return text(f"SELECT bench_sleep({latency_ms})")
+
+async def previous_get_poll(db, poll_id, current_user=None, session_id=None, sleep=None):
+    """get_poll's statements on a blocking Session, as the handler ran them before"""
+    if sleep is not None:
+        db.execute(sleep)
+    filters = caller_filters(current_user, session_id)
+    if filters:
+        voted = exists().where(Vote.poll_id == poll_id, filters[0])
+        bookmarked = exists().where(Bookmark.poll_id == poll_id, filters[1])
+    else:
+        voted = bookmarked = false()
+    poll, user_has_voted, user_has_bookmarked = db.query(Poll, voted, bookmarked).options(
+        joinedload(Poll.options),
+        selectinload(Poll.tags),
+    ).filter(Poll.id == poll_id).one()
+    return FastJSONResponse(poll_payload(poll, bool(user_has_voted), bool(user_has_bookmarked)))
+
+async def previous_request(poll_id, user_id, session_id, sleep):
+    db = SessionLocal()
+    try:
+        current_user = db.get(User, user_id) if user_id else None
+        return (await previous_get_poll(db, poll_id, current_user, session_id, sleep)).body
+    finally:
+        db.close()
+
+async def current_request(poll_id, user_id, session_id, sleep):
+    async with AsyncSessionLocal() as db:
+        current_user = await db.get(User, user_id) if user_id else None
+        if sleep is not None:
+            await db.execute(sleep)
+        response = await get_poll(poll_id=poll_id, db=db, current_user=current_user, session_id=session_id, if_none_match=None)
+        return response.body
+
+async def measure(request, poll_ids, caller, concurrency: int, n_requests: int, sleep):
+    """(requests/s, mean latency ms, bodies) for n_requests served concurrency at a time.
+
+    Latency is concurrency / throughput, what each of `concurrency` clients issuing
+    requests back to back would see; timing individual calls would miss the time a
+    blocked loop keeps the other requests from starting.
+    """
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            return await request(poll_ids[i % len(poll_ids)], caller[0], caller[1], sleep)
+
+    t0 = time.perf_counter()
+    bodies = await asyncio.gather(*(one(i) for i in range(n_requests)))
+    throughput = n_requests / (time.perf_counter() - t0)
+    return throughput, concurrency / throughput * 1000, bodies
+
+async def compare(poll_ids, callers, concurrency: int, n_requests: int, sleep):
+    for name, caller in callers:
+        # Warm both pools so connection setup is not timed
+        await measure(previous_request, poll_ids, caller, concurrency, concurrency, sleep)
+        await measure(current_request, poll_ids, caller, concurrency, concurrency, sleep)
+        prev_rps, prev_ms, prev_bodies = await measure(previous_request, poll_ids, caller, concurrency, n_requests, sleep)
+        cur_rps, cur_ms, cur_bodies = await measure(current_request, poll_ids, caller, concurrency, n_requests, sleep)
+        status = "identical" if prev_bodies == cur_bodies else "MISMATCH"
+        print(f"  {name:<9} blocking {prev_rps:8.1f} req/s ({prev_ms:7.2f} ms)   "
+              f"async {cur_rps:8.1f} req/s ({cur_ms:7.2f} ms)   {cur_rps / prev_rps:5.2f}x   {status}")
+
+def run(concurrency: int, n_requests: int, latency_ms: float):
+    init_db()
+    user_id, session_id, poll_ids = seed(50, 4, 20)
+    sleep = install_sleep(latency_ms) if latency_ms > 0 else None
+    try:
+        print(f"{engine.dialect.name}: {n_requests} requests, {concurrency} concurrent, {latency_ms:g} ms added latency")
+        callers = [("anonymous", (None, None)), ("session", (None, session_id)), ("user", (user_id, None))]
+        asyncio.run(compare(poll_ids, callers, concurrency, n_requests, sleep))
+    finally:
+        cleanup(user_id)
+
+if __name__ == "__main__":
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("Set DATABASE_URL to a scratch database")
+    args = [float(a) for a in sys.argv[1:]]
+    concurrency, n_requests, latency_ms = (args + [20, 500, 5][len(args):])[:3]
+    run(int(concurrency), int(n_requests), latency_ms)
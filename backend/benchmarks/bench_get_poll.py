@@ -0,0 +1,146 @@
+"""
+Benchmark: statements and latency of get_poll, previous query sequence vs the current one
+Usage: DATABASE_URL=<scratch database> python benchmarks/bench_get_poll.py [polls] [options] [votes] [rounds]
+Seeds its own user, tags and polls (titles start with 'bench:') and deletes them afterwards.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+from sqlalchemy import event
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import init_db, User, Poll, Option, Vote, Bookmark, Tag
+from models.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from routers.polls import get_poll
+from services.serialization import FastJSONResponse, poll_payload
+
+def seed(n_polls: int, n_options: int, n_votes: int):
+    """Polls with options, tags and anonymous votes; the bench user votes on and
+    bookmarks every other poll. Returns (user id, session id, poll ids)."""
+    db = SessionLocal()
+    suffix = uuid.uuid4().hex[:8]
+    user = User(email=f"bench-{suffix}@example.com", username=f"bench_{suffix}", hashed_password="x")
+    tags = [Tag(name=f"bench-{suffix}-{i}", slug=f"bench-{suffix}-{i}") for i in range(3)]
+    db.add_all([user, *tags])
+    db.flush()
+    poll_ids = []
+    for i in range(n_polls):
+        poll = Poll(title=f"bench: poll {i}", description="Seeded by bench_get_poll", creator_id=user.id, tags=tags)
+        poll.options = [Option(text=f"Option {j}", vote_count=0) for j in range(n_options)]
+        db.add(poll)
+        db.flush()
+        for v in range(n_votes):
+            option = poll.options[v % n_options]
+            option.vote_count += 1
+            db.add(Vote(poll_id=poll.id, option_id=option.id, client_session_id=f"bench-{suffix}-{v}"))
+        if i % 2 == 0:
+            db.add(Vote(poll_id=poll.id, option_id=poll.options[0].id, user_id=user.id))
+            db.add(Bookmark(poll_id=poll.id, user_id=user.id))
+            poll.options[0].vote_count += 1
+            poll.bookmark_count = 1
+        poll.total_votes = sum(option.vote_count for option in poll.options)
+        poll_ids.append(poll.id)
+        db.commit()
+    user_id = user.id
+    db.close()
+    return user_id, f"bench-{suffix}-0", poll_ids
+
+def cleanup(user_id):
+    db = SessionLocal()
+    user = db.query(User).filter(User.id == user_id).one()
+    for poll in db.query(Poll).filter(Poll.creator_id == user_id):
+        db.delete(poll)
+    db.flush()
+    db.query(Tag).filter(Tag.slug.like(f"bench-{user.username[6:]}-%")).delete(synchronize_session=False)
+    db.delete(user)
+    db.commit()
+    db.close()
+
+def previous_get_poll(db, poll_id, current_user=None, session_id=None):
+    """The query sequence get_poll ran before: poll, lazy options, vote check, bookmark
+    check and lazy tags, one round trip each"""
+    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    options = list(poll.options)
+    user_has_voted = user_has_bookmarked = False
+    if current_user or session_id:
+        voter = Vote.user_id == current_user.id if current_user else Vote.client_session_id == session_id
+        bookmarker = Bookmark.user_id == current_user.id if current_user else Bookmark.client_session_id == session_id
+        user_has_voted = db.query(Vote).filter(Vote.poll_id == poll_id, voter).first() is not None
+        user_has_bookmarked = db.query(Bookmark).filter(Bookmark.poll_id == poll_id, bookmarker).first() is not None
+    tags = list(poll.tags)
+    assert len(options) and tags is not None
+    return FastJSONResponse(poll_payload(poll, user_has_voted, user_has_bookmarked))
+
+def previous_request(poll_id, caller, statements):
+    """(body, seconds, statements) for the previous sequence on a fresh sync session"""
+    db = SessionLocal()
+    try:
+        current_user = db.get(User, caller[0]) if caller[0] else None
+        before = statements[0]
+        t0 = time.perf_counter()
+        body = previous_get_poll(db, poll_id, current_user, caller[1]).body
+        return body, time.perf_counter() - t0, statements[0] - before
+    finally:
+        db.close()
+
+_loop = asyncio.new_event_loop()
+
+async def _current_request(poll_id, caller, statements):
+    async with AsyncSessionLocal() as db:
+        current_user = await db.get(User, caller[0]) if caller[0] else None
+        before = statements[0]
+        t0 = time.perf_counter()
+        response = await get_poll(poll_id=poll_id, db=db, current_user=current_user, session_id=caller[1], if_none_match=None)
+        return response.body, time.perf_counter() - t0, statements[0] - before
+
+def current_request(poll_id, caller, statements):
+    """(body, seconds, statements) for the handler on a fresh async session, as in the app"""
+    return _loop.run_until_complete(_current_request(poll_id, caller, statements))
+
+def measure(fn, poll_ids, caller, rounds: int):
+    """(statements per request, mean ms, p95 ms) with a fresh session per request"""
+    statements = [0]
+    def count(*args):
+        statements[0] += 1
+    timings, bodies = [], []
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", count)
+    try:
+        for r in range(rounds):
+            body, elapsed, per_request = fn(poll_ids[r % len(poll_ids)], caller, statements)
+            bodies.append(body)
+            timings.append(elapsed)
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", count)
+    timings.sort()
+    return per_request, statistics.mean(timings) * 1000, timings[int(len(timings) * 0.95)] * 1000, bodies
+
+def run(n_polls: int, n_options: int, n_votes: int, rounds: int):
+    init_db()
+    user_id, session_id, poll_ids = seed(n_polls, n_options, n_votes)
+    try:
+        print(f"{engine.dialect.name}: {n_polls} polls, {n_options} options, {n_votes} votes each, {rounds} requests")
+        for name, caller in [("anonymous", (None, None)), ("session", (None, session_id)), ("user", (user_id, None))]:
+            prev_n, prev_mean, prev_p95, prev_bodies = measure(previous_request, poll_ids, caller, rounds)
+            cur_n, cur_mean, cur_p95, cur_bodies = measure(current_request, poll_ids, caller, rounds)
+            assert cur_n == 2, f"get_poll issued {cur_n} statements for a {name} caller, expected 2"
+            status = "identical" if prev_bodies == cur_bodies else "MISMATCH"
+            print(f"  {name:<9} previous {prev_n} stmts {prev_mean:7.3f} ms (p95 {prev_p95:7.3f})   "
+                  f"current {cur_n} stmts {cur_mean:7.3f} ms (p95 {cur_p95:7.3f})   {status}")
+    finally:
+        cleanup(user_id)
+
+if __name__ == "__main__":
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("Set DATABASE_URL to a scratch database")
+    args = [int(a) for a in sys.argv[1:]]
+    n_polls, n_options, n_votes, rounds = (args + [50, 4, 20, 500][len(args):])[:4]
+    run(n_polls, n_options, n_votes, rounds)
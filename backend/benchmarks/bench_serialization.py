@@ -0,0 +1,135 @@
+"""
+Benchmark: pydantic response models vs the fast poll serialization path
+Usage: python benchmarks/bench_serialization.py [polls] [options] [tags] [rounds]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+from uuid import uuid4
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schemas import PollListResponse, PollResponse, OptionResponse, TagResponse
+from services.serialization import FastJSONResponse, poll_list_payload, poll_payload
+
+def make_polls(n_polls: int, n_options: int, n_tags: int):
+    """ORM-shaped stand-ins for loaded Poll rows"""
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    tags = [
+        SimpleNamespace(id=uuid4(), name=f"Tag {i}", slug=f"tag-{i}", description="A tag", created_at=now)
+        for i in range(n_tags)
+    ]
+    polls = []
+    for i in range(n_polls):
+        options = [SimpleNamespace(id=uuid4(), text=f"Option {j}", vote_count=j * 7) for j in range(n_options)]
+        polls.append(SimpleNamespace(
+            id=uuid4(),
+            title=f"Poll number {i}",
+            description="What do you think about this?" if i % 2 else None,
+            creator_id=uuid4(),
+            created_at=now - timedelta(minutes=i),
+            expires_at=now + timedelta(days=1) if i % 3 else None,
+            total_votes=sum(option.vote_count for option in options),
+            bookmark_count=i,
+            options=options,
+            tags=tags,
+        ))
+    return polls
+
+def legacy_list_models(polls) -> List[PollListResponse]:
+    """What the list handlers built before: one model per poll, option and tag"""
+    return [
+        PollListResponse(
+            id=poll.id,
+            title=poll.title,
+            description=poll.description,
+            creator_id=poll.creator_id,
+            created_at=poll.created_at,
+            expires_at=poll.expires_at,
+            total_votes=poll.total_votes,
+            bookmark_count=poll.bookmark_count,
+            option_count=len(poll.options),
+            options=[OptionResponse(id=o.id, text=o.text, vote_count=o.vote_count) for o in poll.options],
+            user_has_bookmarked=True,
+            tags=[
+                TagResponse(id=t.id, name=t.name, slug=t.slug, description=t.description, created_at=t.created_at)
+                for t in poll.tags
+            ],
+        )
+        for poll in polls
+    ]
+
+def legacy_detail_model(poll) -> PollResponse:
+    return PollResponse(
+        id=poll.id,
+        title=poll.title,
+        description=poll.description,
+        creator_id=poll.creator_id,
+        expires_at=poll.expires_at,
+        created_at=poll.created_at,
+        options=[OptionResponse(id=o.id, text=o.text, vote_count=o.vote_count) for o in poll.options],
+        bookmark_count=poll.bookmark_count,
+        total_votes=poll.total_votes,
+        user_has_voted=True,
+        user_has_bookmarked=False,
+        tags=[
+            TagResponse(id=t.id, name=t.name, slug=t.slug, description=t.description, created_at=t.created_at)
+            for t in poll.tags
+        ],
+    )
+
+async def legacy_body(field, content) -> bytes:
+    """FastAPI's own path: validate against response_model, dump, then stdlib json"""
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+def timed(fn, rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - t0) / rounds
+
+def run(n_polls: int, n_options: int, n_tags: int, rounds: int):
+    polls = make_polls(n_polls, n_options, n_tags)
+    list_field = create_response_field(name="list", type_=List[PollListResponse])
+    detail_field = create_response_field(name="detail", type_=PollResponse)
+    loop = asyncio.new_event_loop()
+
+    cases = [
+        (
+            f"list page ({n_polls} polls)",
+            lambda: loop.run_until_complete(legacy_body(list_field, legacy_list_models(polls))),
+            lambda: FastJSONResponse([
+                poll_list_payload(poll, include_options=True, user_has_bookmarked=True) for poll in polls
+            ]).body,
+        ),
+        (
+            "single poll",
+            lambda: loop.run_until_complete(legacy_body(detail_field, legacy_detail_model(polls[0]))),
+            lambda: FastJSONResponse(poll_payload(polls[0], True, False)).body,
+        ),
+    ]
+
+    print(f"{n_options} options and {n_tags} tags per poll, {rounds} rounds")
+    for name, legacy_fn, fast_fn in cases:
+        status = "identical" if orjson.loads(legacy_fn()) == orjson.loads(fast_fn()) else "MISMATCH"
+        legacy = timed(legacy_fn, rounds)
+        fast = timed(fast_fn, rounds)
+        print(f"  {name:<22} models {legacy * 1000:8.3f} ms   fast {fast * 1000:8.3f} ms   "
+              f"{legacy / fast:6.1f}x   {status}")
+    loop.close()
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    n_polls, n_options, n_tags, rounds = (args + [100, 4, 3, 200][len(args):])[:4]
+    run(n_polls, n_options, n_tags, rounds)
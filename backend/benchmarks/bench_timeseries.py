@@ -0,0 +1,107 @@
+"""
+Benchmark: legacy per-vote timeseries loop vs the vectorized engine
+Usage: python benchmarks/bench_timeseries.py [votes] [points] [options]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.timeseries import build_timeseries
+
+def legacy_timeseries(option_ids, id_to_label, events, ts_list, metric, smooth=None, window=3):
+    """The original get_poll_timeseries sampling, percent and smoothing code"""
+    def _apply_moving_average(values: List[float], window: int) -> List[float]:
+        if window <= 1 or not values:
+            return values
+        half = window // 2
+        smoothed: List[float] = []
+        for i in range(len(values)):
+            start = max(0, i - half)
+            end = min(len(values), i + half + 1)
+            segment = values[start:end]
+            smoothed.append(sum(segment) / len(segment))
+        return smoothed
+
+    def _apply_ema(values: List[float], window: int) -> List[float]:
+        if window <= 1 or not values:
+            return values
+        alpha = 2 / (window + 1)
+        result: List[float] = []
+        prev = values[0]
+        for v in values:
+            prev = alpha * v + (1 - alpha) * prev
+            result.append(prev)
+        return result
+
+    points = len(ts_list)
+    counts = {opt_id: 0 for opt_id in option_ids}
+    series_counts: Dict[str, List[int]] = {opt_id: [0] * points for opt_id in option_ids}
+    event_idx = 0
+    for i, t in enumerate(ts_list):
+        t_epoch = t.timestamp()
+        while event_idx < len(events) and events[event_idx][0] <= t_epoch:
+            _, opt_id, count = events[event_idx]
+            counts[opt_id] = counts.get(opt_id, 0) + count
+            event_idx += 1
+        for opt_id in option_ids:
+            series_counts[opt_id][i] = counts.get(opt_id, 0)
+
+    series_data = []
+    for opt_id in option_ids:
+        values = [float(v) for v in series_counts[opt_id]]
+        if metric == "percent":
+            totals = [sum(series_counts[oid][i] for oid in option_ids) for i in range(points)]
+            values = [(values[i] / totals[i] * 100.0) if totals[i] > 0 else 0.0 for i in range(points)]
+        if smooth == "ma":
+            values = _apply_moving_average(values, window)
+        elif smooth == "ema":
+            values = _apply_ema(values, window)
+        series_data.append({
+            "id": id_to_label.get(opt_id, opt_id),
+            "label": id_to_label.get(opt_id, opt_id),
+            "data": [{"x": ts_list[i].isoformat(), "y": round(values[i], 4)} for i in range(points)]
+        })
+    return {"series": series_data, "meta": {"optionIdToLabel": id_to_label}}
+
+def run(votes: int, points: int, n_options: int):
+    rng = np.random.default_rng(42)
+    end = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=7)
+    span = (end - start).total_seconds()
+    option_ids = [f"option-{i}" for i in range(n_options)]
+    id_to_label = {opt_id: opt_id.upper() for opt_id in option_ids}
+
+    # Raw votes as the engine consumes them: epoch and option index arrays
+    epochs = np.sort(start.timestamp() + rng.random(votes) * span)
+    option_idx = rng.integers(0, n_options, votes)
+    # ...and as the legacy loop consumed them: one time-ordered Python object per vote
+    events = [(epoch, option_ids[idx], 1) for epoch, idx in zip(epochs.tolist(), option_idx.tolist())]
+
+    step = span / (points - 1)
+    ts_list = [start + timedelta(seconds=step * i) for i in range(points)]
+
+    print(f"{votes:,} votes, {points} points, {n_options} options")
+    for metric, smooth in [("count", None), ("percent", None), ("percent", "ma"), ("percent", "ema")]:
+        t0 = time.perf_counter()
+        expected = legacy_timeseries(option_ids, id_to_label, events, ts_list, metric, smooth, 5)
+        legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        actual = build_timeseries(option_ids, id_to_label, epochs, option_idx, None, ts_list, metric, smooth, 5)
+        vectorized = time.perf_counter() - t0
+
+        status = "identical" if actual == expected else "MISMATCH"
+        print(f"  {metric:<8} {smooth or '-':<4} legacy {legacy * 1000:9.1f} ms   "
+              f"vectorized {vectorized * 1000:8.1f} ms   {legacy / vectorized:6.1f}x   {status}")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    votes, points, n_options = (args + [1_000_000, 200, 10][len(args):])[:3]
+    run(votes, points, n_options)
@@ -0,0 +1,113 @@
+"""
+Benchmark: vote write throughput, one transaction per vote vs group commit
+Usage: DATABASE_URL=<scratch database> python benchmarks/bench_vote_ingest.py [concurrency] [votes] [batch_size] [max_wait_ms]
+Casts `votes` votes from distinct sessions on a few seeded polls, `concurrency` at a time,
+through submit_vote: first with each vote committed on its own, then through the
+group-commit queue. Seeds 'bench:' polls (see bench_get_poll) and deletes them afterwards.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+from sqlalchemy import event, func
+from sqlalchemy.exc import OperationalError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_get_poll import seed, cleanup
+from models import init_db, Poll, Option, Vote
+from models.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from routers.votes import submit_vote
+from schemas import VoteCreate
+from services.vote_ingest import vote_ingest
+
+def poll_options(poll_ids):
+    db = SessionLocal()
+    try:
+        return [(poll_id, [option.id for option in db.get(Poll, poll_id).options]) for poll_id in poll_ids]
+    finally:
+        db.close()
+
+async def cast(polls, n_votes: int, concurrency: int, label: str):
+    """(votes/s, mean ms per vote, commits, failed votes) for n_votes cast concurrency at a time"""
+    gate = asyncio.Semaphore(concurrency)
+    commits = [0]
+    failures = []
+    def count(*args):
+        commits[0] += 1
+
+    async def one(i):
+        poll_id, option_ids = polls[i % len(polls)]
+        async with gate:
+            async with AsyncSessionLocal() as db:
+                try:
+                    await submit_vote(
+                        poll_id=poll_id,
+                        vote_data=VoteCreate(option_id=option_ids[i % len(option_ids)]),
+                        db=db,
+                        current_user=None,
+                        session_id=f"bench-{label}-{i}",
+                    )
+                except OperationalError as e:
+                    # e.g. SQLite's single writer lock timing out under many concurrent commits
+                    failures.append(str(e.orig))
+
+    event.listen(async_engine.sync_engine, "commit", count)
+    try:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_votes)))
+        throughput = n_votes / (time.perf_counter() - t0)
+    finally:
+        event.remove(async_engine.sync_engine, "commit", count)
+    return throughput, concurrency / throughput * 1000, commits[0], len(failures)
+
+async def compare(polls, concurrency: int, n_votes: int):
+    vote_ingest.enabled = False
+    direct = await cast(polls, n_votes, concurrency, f"direct-{uuid.uuid4().hex[:6]}")
+    vote_ingest.enabled = True
+    vote_ingest.start()
+    try:
+        grouped = await cast(polls, n_votes, concurrency, f"group-{uuid.uuid4().hex[:6]}")
+    finally:
+        await vote_ingest.stop()
+    stats = vote_ingest.stats()
+    print(f"  per vote      {direct[0]:8.1f} votes/s ({direct[1]:7.2f} ms)   {direct[2]} commits, {direct[3]} failed")
+    print(f"  group commit  {grouped[0]:8.1f} votes/s ({grouped[1]:7.2f} ms)   {grouped[2]} commits, {grouped[3]} failed, "
+          f"{stats['batches']} batches, peak queue {stats['peak_queue_depth']}   {grouped[0] / direct[0]:5.2f}x")
+
+def check(poll_ids):
+    """Counters must match the vote rows after both runs"""
+    db = SessionLocal()
+    try:
+        for poll_id in poll_ids:
+            votes = db.query(func.count(Vote.id)).filter(Vote.poll_id == poll_id).scalar()
+            options = db.query(func.sum(Option.vote_count)).filter(Option.poll_id == poll_id).scalar()
+            total = db.get(Poll, poll_id).total_votes
+            if not votes == options == total:
+                return f"MISMATCH on {poll_id}: {votes} votes, options {options}, total {total}"
+        return "counters consistent"
+    finally:
+        db.close()
+
+def run(concurrency: int, n_votes: int, batch_size: int, max_wait_ms: float):
+    init_db()
+    user_id, _, poll_ids = seed(4, 4, 0)
+    vote_ingest.batch_size = batch_size
+    vote_ingest.max_wait = max_wait_ms / 1000
+    try:
+        print(f"{engine.dialect.name}: {n_votes} votes on {len(poll_ids)} polls, {concurrency} concurrent, "
+              f"batches of up to {batch_size} within {max_wait_ms:g} ms")
+        asyncio.run(compare(poll_options(poll_ids), concurrency, n_votes))
+        print(f"  {check(poll_ids)}")
+    finally:
+        cleanup(user_id)
+
+if __name__ == "__main__":
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("Set DATABASE_URL to a scratch database")
+    args = [float(a) for a in sys.argv[1:]]
+    concurrency, n_votes, batch_size, max_wait_ms = (args + [100, 2000, 200, 5][len(args):])[:4]
+    run(int(concurrency), int(n_votes), int(batch_size), max_wait_ms)
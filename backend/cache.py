@@ -1,24 +1,161 @@
 """
-Optional Redis caching layer
-The application works fine without Redis, but will use caching if Redis is available
+Two-tier caching layer
+An in-process LRU serves hot keys without I/O; Redis, when available, is the shared
+tier behind it and carries invalidations between workers over pub/sub.
+The application works fine without Redis, using the in-process tier alone.
 """
 
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Hashable, List, Set, Tuple
+import hashlib
 import json
-from typing import Optional, Any
 import os
+import threading
+import time
 
 try:
     import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
+from services.serialization import dumps as encode_value, loads as decode_value
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL and tag-based invalidation.
+    
+    Bounded by entry count and, when max_bytes is set, by the sizes passed to set().
+    Values are stored by reference and must not be mutated by callers.
+    """
+    
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 300, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (expires_at monotonic seconds, value, tag, size); oldest access first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Optional[str], int]]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get value from cache, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tag: Optional[str] = None, size: int = 0):
+        """Set value with TTL in seconds; tag groups keys for invalidate_tag().
+        size is the entry's approximate footprint in bytes, counted against max_bytes."""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value, tag, size)
+            self.total_bytes += size
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def delete(self, key: Hashable):
+        """Delete key from cache"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """Drop every entry stored under tag; returns how many were removed"""
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.total_bytes -= entry[3]
+            return len(keys)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.total_bytes = 0
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+    
+    def _remove(self, key: Hashable):
+        # Caller holds the lock
+        _, _, tag, size = self._entries.pop(key)
+        self.total_bytes -= size
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+# Workers publish invalidated keys here so every local tier drops its copy
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+# Sent instead of a key when every local entry must go (pattern deletes)
+CLEAR_ALL_MESSAGE = "*"
+
+class _GenerationRead:
+    """A generation counter read in flight; stale once the counter's local entry is dropped"""
+    __slots__ = ("stale",)
+    
+    def __init__(self):
+        self.stale = False
+
 class CacheManager:
-    """Optional Redis cache manager that gracefully degrades if Redis is not available"""
+    """Two-tier cache: a bounded in-process LRU in front of optional Redis.
+    
+    Local hits cost no I/O. Deletes and generation bumps are broadcast over Redis
+    pub/sub so every worker drops its local copy; without Redis the local tier and
+    generation counters keep working in-process.
+    Async endpoints use the a* methods (redis.asyncio, batched with pipelines); the
+    synchronous methods remain for scripts and background threads.
+    """
     
     def __init__(self):
         self.redis_client = None
-        self.enabled = False
+        self.async_client = None
+        self.enabled = False  # Redis tier available
+        # Local entries live at most this long, bounding staleness if a pub/sub message is lost
+        self.local_max_ttl = float(os.getenv('CACHE_LOCAL_MAX_TTL', 60))
+        self.local = LocalCache(
+            max_entries=int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', 4096)),
+            max_bytes=int(os.getenv('CACHE_LOCAL_MAX_BYTES', 32 * 1024 * 1024)),
+            default_ttl=self.local_max_ttl,
+        )
+        # Generation counters when running without Redis; never evicted
+        self._local_generations: Dict[str, int] = {}
+        self._generations_lock = threading.Lock()
+        # Redis reads of generation counters in flight, per key (see _finish_generation_read)
+        self._generation_reads: Dict[str, List[_GenerationRead]] = {}
         
         if REDIS_AVAILABLE:
             redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -26,89 +163,371 @@ class CacheManager:
                 self.redis_client = redis.from_url(redis_url, decode_responses=True)
                 # Test connection
                 self.redis_client.ping()
+                # Connects lazily on the running event loop
+                self.async_client = aioredis.from_url(redis_url)
                 self.enabled = True
+                self.start_invalidation_listener()
                 print("✓ Redis cache enabled")
             except Exception as e:
-                print(f"⚠ Redis not available: {e}. Running without cache.")
+                print(f"⚠ Redis not available: {e}. Using in-process cache only.")
                 self.enabled = False
         else:
-            print("⚠ Redis package not installed. Running without cache.")
+            print("⚠ Redis package not installed. Using in-process cache only.")
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if not self.enabled:
+    def _fill_local(self, key: str, raw, pttl: Optional[int]) -> Any:
+        # Local copy never outlives the Redis entry it came from
+        value = decode_value(raw)
+        ttl = min(self.local_max_ttl, pttl / 1000) if pttl and pttl > 0 else self.local_max_ttl
+        self.local.set(key, value, ttl=ttl, size=len(raw))
+        return value
+    
+    def _encode_local(self, key: str, value: Any, ttl: int) -> bytes:
+        encoded = encode_value(value)
+        self.local.set(key, value, ttl=min(ttl, self.local_max_ttl), size=len(encoded))
+        return encoded
+    
+    def _bump_local_generation(self, key: str):
+        with self._generations_lock:
+            self._local_generations[key] = self._local_generations.get(key, 0) + 1
+    
+    def _local_generation(self, key: str) -> int:
+        with self._generations_lock:
+            return self._local_generations.get(key, 0)
+    
+    def _start_generation_read(self, key: str) -> "_GenerationRead":
+        read = _GenerationRead()
+        with self._generations_lock:
+            self._generation_reads.setdefault(key, []).append(read)
+        return read
+    
+    def _finish_generation_read(self, key: str, read: "_GenerationRead", value: Optional[int]):
+        # A bump that landed while the read was in flight may postdate the value read;
+        # caching it locally would serve the old generation until the entry expires
+        with self._generations_lock:
+            reads = self._generation_reads.get(key, [])
+            if read in reads:
+                reads.remove(read)
+            if not reads:
+                self._generation_reads.pop(key, None)
+            if value is not None and not read.stale:
+                self.local.set(key, value)
+    
+    def _drop_local(self, key: Optional[str] = None):
+        """Drop one local entry (every entry if key is None), marking generation reads of it stale"""
+        with self._generations_lock:
+            for read_key, reads in self._generation_reads.items():
+                if key is None or read_key == key:
+                    for read in reads:
+                        read.stale = True
+            if key is None:
+                self.local.clear()
+            else:
+                self.local.delete(key)
+    
+    # --- async API (request handlers) ---
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get value from the local tier, falling back to Redis"""
+        value = self.local.get(key)
+        if value is not None or not self.enabled:
+            return value
+        
+        try:
+            # Value and remaining TTL in one round trip
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                raw, pttl = await pipe.get(key).pttl(key).execute()
+            return self._fill_local(key, raw, pttl) if raw else None
+        except Exception as e:
+            print(f"Cache get error: {e}")
             return None
+    
+    async def amget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get many values; local misses are fetched from Redis in a single round trip"""
+        values = [self.local.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if not missing or not self.enabled:
+            return values
+        
+        try:
+            missing_keys = [keys[i] for i in missing]
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                pipe.mget(missing_keys)
+                for key in missing_keys:
+                    pipe.pttl(key)
+                raws, *pttls = await pipe.execute()
+            for i, key, raw, pttl in zip(missing, missing_keys, raws, pttls):
+                if raw:
+                    values[i] = self._fill_local(key, raw, pttl)
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+        return values
+    
+    async def aset(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value in both tiers with TTL in seconds (default 5 minutes)"""
+        return await self.aset_many({key: value}, ttl)
+    
+    async def aset_many(self, items: Dict[str, Any], ttl: int = 300) -> bool:
+        """Set several values with one pipelined round trip"""
+        try:
+            encoded = {key: self._encode_local(key, value, ttl) for key, value in items.items()}
+        except Exception as e:
+            print(f"Cache set error: {e}")
+            return False
+        if not self.enabled:
+            return True
+        
+        try:
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                for key, raw in encoded.items():
+                    pipe.setex(key, ttl, raw)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache set error: {e}")
+            return False
+    
+    async def adelete(self, *keys: str) -> bool:
+        """Delete keys from both tiers on every worker"""
+        for key in keys:
+            self.local.delete(key)
+        if not self.enabled or not keys:
+            return True
+        
+        try:
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                for key in keys:
+                    pipe.publish(CACHE_INVALIDATION_CHANNEL, key)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache delete error: {e}")
+            return False
+    
+    async def aget_generation(self, key: str) -> Optional[int]:
+        """Current value of a generation counter (0 if never bumped), or None on Redis errors"""
+        if not self.enabled:
+            return self._local_generation(key)
         
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        read = self._start_generation_read(key)
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return json.loads(value)
+            raw = await self.async_client.get(key)
+            value = int(raw) if raw else 0
+            return value
+        except Exception as e:
+            print(f"Cache generation get error: {e}")
             return None
+        finally:
+            self._finish_generation_read(key, read, value)
+    
+    async def abump_generation(self, *keys: str) -> bool:
+        """Advance generation counters; keys built from old values are never read again"""
+        if not self.enabled:
+            for key in keys:
+                self._bump_local_generation(key)
+            return True
+        
+        try:
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+                    pipe.publish(CACHE_INVALIDATION_CHANNEL, key)
+                await pipe.execute()
+            for key in keys:
+                self._drop_local(key)
+            return True
+        except Exception as e:
+            print(f"Cache generation bump error: {e}")
+            return False
+    
+    # --- synchronous API (scripts, threads) ---
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from the local tier, falling back to Redis"""
+        value = self.local.get(key)
+        if value is not None or not self.enabled:
+            return value
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, pttl = pipe.execute()
+            return self._fill_local(key, raw, pttl) if raw else None
         except Exception as e:
             print(f"Cache get error: {e}")
             return None
     
     def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Set value in cache with TTL in seconds (default 5 minutes)"""
-        if not self.enabled:
+        """Set value in both tiers with TTL in seconds (default 5 minutes)"""
+        try:
+            encoded = self._encode_local(key, value, ttl)
+        except Exception as e:
+            print(f"Cache set error: {e}")
             return False
+        if not self.enabled:
+            return True
         
         try:
-            serialized = json.dumps(value)
-            self.redis_client.setex(key, ttl, serialized)
+            self.redis_client.setex(key, ttl, encoded)
             return True
         except Exception as e:
             print(f"Cache set error: {e}")
             return False
     
     def delete(self, key: str) -> bool:
-        """Delete key from cache"""
+        """Delete key from both tiers on every worker"""
+        self.local.delete(key)
         if not self.enabled:
-            return False
+            return True
         
         try:
             self.redis_client.delete(key)
+            self.redis_client.publish(CACHE_INVALIDATION_CHANNEL, key)
             return True
         except Exception as e:
             print(f"Cache delete error: {e}")
             return False
     
     def delete_pattern(self, pattern: str) -> bool:
-        """Delete all keys matching pattern"""
+        """Delete all keys matching pattern (incremental SCAN; avoid on hot paths).
+        Local tiers are cleared entirely."""
+        self.local.clear()
         if not self.enabled:
-            return False
+            return True
         
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                self.redis_client.delete(*keys)
+            batch = []
+            for key in self.redis_client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    self.redis_client.delete(*batch)
+                    batch = []
+            if batch:
+                self.redis_client.delete(*batch)
+            self.redis_client.publish(CACHE_INVALIDATION_CHANNEL, CLEAR_ALL_MESSAGE)
             return True
         except Exception as e:
             print(f"Cache delete pattern error: {e}")
             return False
+    
+    def get_generation(self, key: str) -> Optional[int]:
+        """Current value of a generation counter (0 if never bumped), or None on Redis errors"""
+        if not self.enabled:
+            return self._local_generation(key)
+        
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        read = self._start_generation_read(key)
+        try:
+            raw = self.redis_client.get(key)
+            value = int(raw) if raw else 0
+            return value
+        except Exception as e:
+            print(f"Cache generation get error: {e}")
+            return None
+        finally:
+            self._finish_generation_read(key, read, value)
+    
+    def bump_generation(self, key: str) -> bool:
+        """Advance a generation counter; keys built from the old value are never read again"""
+        if not self.enabled:
+            self._bump_local_generation(key)
+            return True
+        
+        try:
+            self.redis_client.incr(key)
+            self._drop_local(key)
+            self.redis_client.publish(CACHE_INVALIDATION_CHANNEL, key)
+            return True
+        except Exception as e:
+            print(f"Cache generation bump error: {e}")
+            return False
+    
+    def start_invalidation_listener(self):
+        """Drop local entries as other workers publish invalidations (daemon thread)"""
+        thread = threading.Thread(target=self._listen_for_invalidations, name="cache-invalidation", daemon=True)
+        thread.start()
+    
+    def _listen_for_invalidations(self):
+        while True:
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    key = message.get("data")
+                    if key == CLEAR_ALL_MESSAGE:
+                        self._drop_local()
+                    elif isinstance(key, str):
+                        self._drop_local(key)
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}")
+            # Messages missed while disconnected can't be replayed
+            self._drop_local()
+            time.sleep(1)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"redis": self.enabled, "local": self.local.stats()}
 
-# Global cache instance
+# Global cache instances
 cache = CacheManager()
 
+# Timeseries responses per poll. Short TTL while a poll is live (votes on other
+# workers are not seen until expiry); long TTL once the poll has closed.
+TIMESERIES_TTL_ACTIVE = 5
+TIMESERIES_TTL_CLOSED = 24 * 3600
+timeseries_cache = LocalCache(max_entries=2048, default_ttl=TIMESERIES_TTL_ACTIVE)
+
+# Poll list pages are keyed by a generation counter that poll writes bump, so
+# invalidation is a single INCR; superseded pages simply age out. Vote and bookmark
+# counts on cached pages may lag by up to the TTL (live counts arrive over WebSocket).
+# Page and tag entries store their ETag alongside the items. The version in their keys
+# keeps entries in an older layout from being read: v2 for tags (ETags), v3 for list
+# pages (ETags, then hashed filters).
+POLLS_LIST_GENERATION_KEY = "polls:list:generation"
+POLLS_LIST_TTL = 15
+
 # Cache key generators
 def poll_cache_key(poll_id: str) -> str:
     return f"poll:{poll_id}"
 
-def polls_list_cache_key(skip: int = 0, limit: int = 100, **filters) -> str:
-    filter_str = "_".join(f"{k}:{v}" for k, v in sorted(filters.items()) if v)
-    return f"polls:list:{skip}:{limit}:{filter_str}"
+def polls_list_cache_key(generation: int, skip: int = 0, limit: int = 100, **filters) -> str:
+    # Filters carry raw user input (search), so they are hashed from an unambiguous encoding
+    params = {k: v for k, v in filters.items() if v}
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"polls:list:v3:g{generation}:{skip}:{limit}:{digest}"
+
+def poll_comments_generation_key(poll_id: str) -> str:
+    return f"comments:poll:{poll_id}:generation"
 
-def poll_comments_cache_key(poll_id: str, parent_id: Optional[str] = None) -> str:
+def poll_comments_cache_key(poll_id: str, generation: int, parent_id: Optional[str] = None) -> str:
     parent_str = parent_id or "top"
-    return f"comments:poll:{poll_id}:parent:{parent_str}"
+    return f"comments:poll:{poll_id}:g{generation}:parent:{parent_str}"
+
+TAGS_GENERATION_KEY = "tags:generation"
+TAGS_TTL = 300
 
-def tags_cache_key() -> str:
-    return "tags:all"
+def tags_cache_key(generation: int, skip: int = 0, limit: int = 100) -> str:
+    return f"tags:all:v2:g{generation}:{skip}:{limit}"
+
+def poll_timeseries_cache_key(poll_id: str, *params: Any) -> Tuple:
+    return ("timeseries", poll_id) + params
 
 # Cache invalidation helpers
-def invalidate_poll_caches(poll_id: str):
+async def invalidate_poll_lists():
+    """Invalidate every cached poll list page in O(1)"""
+    await cache.abump_generation(POLLS_LIST_GENERATION_KEY)
+
+async def invalidate_tags():
+    """Invalidate every cached tag list in O(1)"""
+    await cache.abump_generation(TAGS_GENERATION_KEY)
+
+async def invalidate_poll_caches(poll_id: str):
     """Invalidate all caches related to a poll"""
-    cache.delete(poll_cache_key(poll_id))
-    cache.delete_pattern(f"polls:list:*")  # Invalidate list caches
-    cache.delete_pattern(f"comments:poll:{poll_id}:*")  # Invalidate comment caches
+    await cache.adelete(poll_cache_key(poll_id))
+    await cache.abump_generation(POLLS_LIST_GENERATION_KEY, poll_comments_generation_key(poll_id))
 
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -6,8 +7,14 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from models import init_db
+from models.database import engine
 from routers import auth, polls, votes, likes, tags, comments
 from websocket import handler as ws_handler
+from cache import cache, timeseries_cache
+from services.vote_buffer import vote_buffers
+from services.vote_ingest import vote_ingest
+from services.trending import run_trending_refresher
+from services.search import create_sqlite_fts
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
@@ -18,14 +25,25 @@ async def lifespan(app: FastAPI):
     try:
         print("Starting database initialization...")
         init_db()
+        if engine.dialect.name == "sqlite":
+            # Full-text search index for the SQLite fallback
+            with engine.connect() as conn:
+                create_sqlite_fts(conn)
         print("Database initialization completed successfully")
     except Exception as e:
         print(f"Database initialization failed: {e}")
         print("Continuing without database...")
     
+    # Keep materialized trending scores current in the background
+    trending_task = asyncio.create_task(run_trending_refresher())
+    # Group-commit vote writer (only when VOTE_GROUP_COMMIT is set)
+    vote_ingest.start()
+    
     yield
     
-    # Shutdown: cleanup if needed
+    # Shutdown: stop background tasks, committing any queued votes first
+    await vote_ingest.stop()
+    trending_task.cancel()
 
 app = FastAPI(
     title="QuickPoll API",
@@ -45,6 +63,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Keyset pagination cursor on list endpoints; conditional GET validators
 )
 
 # Include routers (order matters: register specific routes before generic /{poll_id})
@@ -69,7 +88,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     print("Health check endpoint called - OTP version")
-    return {"status": "healthy", "version": "otp-enabled"}
+    return {
+        "status": "healthy",
+        "version": "otp-enabled",
+        "cache": cache.stats(),
+        "timeseries_cache": timeseries_cache.stats(),
+        "vote_buffers": vote_buffers.stats(),
+        "vote_ingest": vote_ingest.stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
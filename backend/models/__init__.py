@@ -8,6 +8,8 @@ from .tag import Tag, poll_tags
 from .comment import Comment
 from .password_reset import PasswordResetToken
 from .otp import OTP
+from .vote_rollup import VoteRollup
+from .trending_state import TrendingState
 
-__all__ = ["Base", "get_db", "init_db", "User", "Poll", "Option", "Vote", "Bookmark", "Like", "Tag", "poll_tags", "Comment", "PasswordResetToken", "OTP"]
+__all__ = ["Base", "get_db", "init_db", "User", "Poll", "Option", "Vote", "Bookmark", "Like", "Tag", "poll_tags", "Comment", "PasswordResetToken", "OTP", "VoteRollup", "TrendingState"]
 
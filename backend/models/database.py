@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from typing import Any, Dict, Tuple
 import os
 
 load_dotenv()
@@ -20,16 +24,45 @@ engine = create_engine(
     max_overflow=20      # Max connections beyond pool_size
 )
 
+# Synchronous sessions are for migration scripts and background threads only
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url: str) -> Tuple[URL, Dict[str, Any]]:
+    """The asyncpg/aiosqlite form of a DATABASE_URL, with any driver connect args"""
+    url = make_url(url)
+    connect_args: Dict[str, Any] = {}
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        # asyncpg takes libpq's sslmode values through its ssl argument
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            connect_args["ssl"] = sslmode
+        url = url.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+# Request handlers use the async engine so database waits yield the event loop
+ASYNC_DATABASE_URL, _async_connect_args = async_database_url(DATABASE_URL)
+# aiosqlite would otherwise open a new connection (and thread) per session
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    connect_args=_async_connect_args,
+)
+
+# Objects stay usable after commit; anything that must be re-read is refreshed explicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def init_db():
     """Initialize database tables"""
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -15,6 +15,14 @@ class Poll(Base):
     expires_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
+    # Denormalized counters, updated in the same transaction as the vote/bookmark rows
+    total_votes = Column(Integer, nullable=False, default=0, server_default="0")
+    bookmark_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Time-decayed vote score in log space, maintained by services.trending (0 = no votes)
+    trending_score = Column(Float, nullable=False, default=0.0, server_default="0")
+    # Bumped with every change to the poll's payload (votes, bookmarks, tags); drives ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Relationships
     creator = relationship("User", back_populates="polls")
     options = relationship("Option", back_populates="poll", cascade="all, delete-orphan")
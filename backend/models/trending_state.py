@@ -0,0 +1,9 @@
+from sqlalchemy import Column, DateTime, Integer
+from .database import Base
+
+class TrendingState(Base):
+    """Single-row watermark: minute rollups before processed_until are folded into Poll.trending_score"""
+    __tablename__ = "trending_state"
+
+    id = Column(Integer, primary_key=True, default=1)
+    processed_until = Column(DateTime(timezone=True), nullable=True)
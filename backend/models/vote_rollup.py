@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from .database import Base
+
+class VoteRollup(Base):
+    """Per-option vote counts pre-aggregated into minute, hour and day buckets"""
+    __tablename__ = "vote_rollups"
+
+    # Primary key order matches the timeseries lookup: poll -> granularity -> time range
+    poll_id = Column(UUID(as_uuid=True), ForeignKey("polls.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String(10), primary_key=True)  # 'minute', 'hour' or 'day'
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    option_id = Column(UUID(as_uuid=True), ForeignKey("options.id", ondelete="CASCADE"), primary_key=True)
+    vote_count = Column(Integer, nullable=False, default=0)
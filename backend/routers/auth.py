@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from models import get_db, User, PasswordResetToken, OTP
 from schemas import UserCreate, UserLogin, Token, UserResponse, ForgotPasswordRequest, ResetPasswordRequest, OTPRequest, OTPVerifyRequest, OTPResetPasswordRequest
 from auth.auth import verify_password, get_password_hash, create_access_token
 from auth.dependencies import get_current_user_required
+from cache import invalidate_poll_lists
 from services.email import generate_otp_code, send_otp_email
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -22,7 +24,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    existing_username = db.query(User).filter(User.username == user_data.username).first()
+    existing_username = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -39,10 +41,10 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         error_msg = str(e.orig)
         if 'username' in error_msg:
             raise HTTPException(
@@ -63,10 +65,10 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user"""
     # Find user
-    user = db.query(User).filter(User.email == user_data.email).first()
+    user = await db.scalar(select(User).where(User.email == user_data.email))
     
     if not user:
         # User doesn't exist - suggest sign up
@@ -100,7 +102,7 @@ async def get_current_user_info(
 @router.delete("/account", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
     current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete the current user's account permanently.
@@ -115,23 +117,38 @@ async def delete_account(
     try:
         # Convert user's votes to anonymous votes by adding a dummy session ID
         # This preserves vote counts while removing user identification
-        user_votes = db.query(Vote).filter(Vote.user_id == current_user.id).all()
+        user_votes = (await db.scalars(select(Vote).where(Vote.user_id == current_user.id))).all()
         for vote in user_votes:
             vote.client_session_id = f"deleted_user_{uuid.uuid4()}"
         
+        # Remove the user's bookmarks explicitly so each poll's bookmark counter
+        # drops in the same transaction
+        from models import Bookmark, Poll
+        bookmarked_poll_ids = select(Bookmark.poll_id).where(Bookmark.user_id == current_user.id)
+        await db.execute(
+            update(Poll).where(Poll.id.in_(bookmarked_poll_ids)).values(
+                {Poll.bookmark_count: Poll.bookmark_count - 1, Poll.version: Poll.version + 1}
+            ).execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(Bookmark).where(Bookmark.user_id == current_user.id).execution_options(synchronize_session=False)
+        )
+        
         # Commit the vote updates before deleting user
-        db.commit()
+        await db.commit()
         
         # Now delete the user
         # - Polls will be CASCADE deleted (ondelete="CASCADE")
         # - Bookmarks will be CASCADE deleted (ondelete="CASCADE")
         # - Votes will have user_id set to NULL (ondelete="SET NULL") - already have session_id
         # - Comments will have user_id set to NULL (ondelete="SET NULL")
-        db.delete(current_user)
-        db.commit()
+        await db.delete(current_user)
+        await db.commit()
+        # The user's polls are gone and bookmark counts changed
+        await invalidate_poll_lists()
         return None
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error deleting account: {e}")
         import traceback
         traceback.print_exc()
@@ -141,12 +158,12 @@ async def delete_account(
         )
 
 @router.post("/send-otp")
-async def send_otp(request: OTPRequest, db: Session = Depends(get_db)):
+async def send_otp(request: OTPRequest, db: AsyncSession = Depends(get_db)):
     """Send OTP code for password reset"""
     from datetime import datetime, timezone, timedelta
     
     # Check if user exists
-    user = db.query(User).filter(User.email == request.email).first()
+    user = await db.scalar(select(User).where(User.email == request.email))
     if not user:
         # Don't reveal if email exists or not for security
         return {"message": "If the email exists, a verification code has been sent"}
@@ -156,10 +173,10 @@ async def send_otp(request: OTPRequest, db: Session = Depends(get_db)):
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)  # OTP expires in 10 minutes
     
     # Invalidate any existing OTPs for this user and purpose
-    db.query(OTP).filter(
+    await db.execute(delete(OTP).where(
         OTP.user_id == user.id,
         OTP.purpose == "password_reset"
-    ).delete()
+    ))
     
     # Create new OTP
     otp = OTP(
@@ -171,7 +188,7 @@ async def send_otp(request: OTPRequest, db: Session = Depends(get_db)):
     )
     
     db.add(otp)
-    db.commit()
+    await db.commit()
     
     # Send OTP via email
     email_sent = send_otp_email(request.email, otp_code, "password_reset")
@@ -183,20 +200,20 @@ async def send_otp(request: OTPRequest, db: Session = Depends(get_db)):
     return {"message": "If the email exists, a verification code has been sent"}
 
 @router.post("/verify-otp")
-async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
+async def verify_otp(request: OTPVerifyRequest, db: AsyncSession = Depends(get_db)):
     """Verify OTP code"""
     # Find the OTP
-    otp = db.query(OTP).filter(
+    otp = await db.scalar(select(OTP).where(
         OTP.email == request.email,
         OTP.code == request.code,
         OTP.purpose == "password_reset"
-    ).first()
+    ).limit(1))
     
     if not otp or not otp.is_valid():
         # Increment attempts if OTP exists but is invalid
         if otp:
             max_attempts_reached = otp.increment_attempts()
-            db.commit()
+            await db.commit()
             if max_attempts_reached:
                 return {"message": "Too many failed attempts. Please request a new code.", "valid": False}
         
@@ -205,20 +222,20 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
     return {"message": "Verification code is valid", "valid": True}
 
 @router.post("/reset-password-otp")
-async def reset_password_otp(request: OTPResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password_otp(request: OTPResetPasswordRequest, db: AsyncSession = Depends(get_db)):
     """Reset password using OTP code"""
     # Find the OTP
-    otp = db.query(OTP).filter(
+    otp = await db.scalar(select(OTP).where(
         OTP.email == request.email,
         OTP.code == request.code,
         OTP.purpose == "password_reset"
-    ).first()
+    ).limit(1))
     
     if not otp or not otp.is_valid():
         # Increment attempts if OTP exists but is invalid
         if otp:
             max_attempts_reached = otp.increment_attempts()
-            db.commit()
+            await db.commit()
             if max_attempts_reached:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -231,7 +248,7 @@ async def reset_password_otp(request: OTPResetPasswordRequest, db: Session = Dep
         )
     
     # Get the user
-    user = db.query(User).filter(User.id == otp.user_id).first()
+    user = await db.get(User, otp.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -244,7 +261,7 @@ async def reset_password_otp(request: OTPResetPasswordRequest, db: Session = Dep
     # Mark OTP as used
     otp.used = True
     
-    db.commit()
+    await db.commit()
     
     return {"message": "Password has been reset successfully"}
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import func, select
 from typing import List, Optional
 from uuid import UUID
 
@@ -14,33 +15,33 @@ router = APIRouter(prefix="/api/polls", tags=["comments"])
 @router.get("/{poll_id}/comments", response_model=List[CommentResponse])
 async def get_comments(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     parent_id: Optional[UUID] = None,
     skip: int = 0,
     limit: int = 100
 ):
     """Get comments for a poll (optionally filtered by parent_id for replies)"""
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    poll = await db.get(Poll, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
-    query = db.query(Comment).filter(Comment.poll_id == poll_id)
+    query = select(Comment).options(selectinload(Comment.user)).where(Comment.poll_id == poll_id)
     
     if parent_id:
         # Get replies to a specific comment
-        query = query.filter(Comment.parent_id == parent_id)
+        query = query.where(Comment.parent_id == parent_id)
     else:
         # Get top-level comments only
-        query = query.filter(Comment.parent_id.is_(None))
+        query = query.where(Comment.parent_id.is_(None))
     
-    comments = query.order_by(Comment.created_at.desc()).offset(skip).limit(limit).all()
+    comments = (await db.scalars(query.order_by(Comment.created_at.desc()).offset(skip).limit(limit))).all()
     
     # Build response with user info and reply counts
     result = []
     for comment in comments:
-        reply_count = db.query(func.count(Comment.id)).filter(
+        reply_count = await db.scalar(select(func.count(Comment.id)).where(
             Comment.parent_id == comment.id
-        ).scalar()
+        ))
         
         user_email = comment.user.email if comment.user else "Anonymous"
         username = comment.user.username if comment.user else "Anonymous"
@@ -64,22 +65,22 @@ async def get_comments(
 async def create_comment(
     poll_id: UUID,
     comment_data: CommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
     """Create a new comment on a poll"""
     # Verify poll exists
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    poll = await db.get(Poll, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Verify parent comment exists if replying
     if comment_data.parent_id:
-        parent = db.query(Comment).filter(
+        parent = await db.scalar(select(Comment.id).where(
             Comment.id == comment_data.parent_id,
             Comment.poll_id == poll_id
-        ).first()
+        ))
         if not parent:
             raise HTTPException(status_code=404, detail="Parent comment not found")
     
@@ -92,11 +93,12 @@ async def create_comment(
         parent_id=comment_data.parent_id
     )
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    await db.commit()
+    await db.refresh(new_comment)
     
-    user_email = new_comment.user.email if new_comment.user else "Anonymous"
-    username = new_comment.user.username if new_comment.user else "Anonymous"
+    # The author is the caller, so there is no need to load the relationship
+    user_email = current_user.email if current_user else "Anonymous"
+    username = current_user.username if current_user else "Anonymous"
     
     # Broadcast new comment via WebSocket
     await manager.broadcast_to_poll(
@@ -131,12 +133,12 @@ async def create_comment(
 async def update_comment(
     comment_id: UUID,
     comment_data: CommentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
     """Update a comment (only by the creator)"""
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.scalar(select(Comment).options(selectinload(Comment.user)).where(Comment.id == comment_id))
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -152,14 +154,14 @@ async def update_comment(
     
     # Update comment
     comment.content = comment_data.content
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment, ["content", "updated_at"])
     
     user_email = comment.user.email if comment.user else "Anonymous"
     username = comment.user.username if comment.user else "Anonymous"
-    reply_count = db.query(func.count(Comment.id)).filter(
+    reply_count = await db.scalar(select(func.count(Comment.id)).where(
         Comment.parent_id == comment.id
-    ).scalar()
+    ))
     
     return CommentResponse(
         id=comment.id,
@@ -177,12 +179,12 @@ async def update_comment(
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_comment(
     comment_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
     """Delete a comment (only by the creator)"""
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -197,8 +199,8 @@ async def delete_comment(
         raise HTTPException(status_code=401, detail="Authentication required")
     
     poll_id = comment.poll_id
-    db.delete(comment)
-    db.commit()
+    await db.delete(comment)
+    await db.commit()
     
     # Broadcast deletion via WebSocket
     await manager.broadcast_to_poll(
@@ -1,123 +1,96 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from uuid import UUID
 
-from models import get_db, User, Poll, Bookmark, Vote, Tag
-from schemas import BookmarkResponse, PollListResponse, OptionResponse, TagResponse
+from models import get_db, User, Poll, Bookmark, Tag
+from schemas import BookmarkResponse, PollListResponse
 from auth.dependencies import get_current_user, get_client_session_id
 from websocket.manager import manager
+from services.serialization import FastJSONResponse
+from services.poll_lists import POLL_LIST_LOADERS, build_poll_list
+from services.pagination import next_cursor_headers, encode_cursor, decode_cursor, keyset_order, keyset_filter, split_page
 
 router = APIRouter(prefix="/api/polls", tags=["bookmarks"])
 
 @router.get("/bookmarks", response_model=List[PollListResponse])
 async def get_user_bookmarks(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
-    """Get all polls bookmarked by the current user"""
-    # Get bookmarked poll IDs
+    """Get the polls bookmarked by the current user, most recently bookmarked first.
+
+    Pages are keyset-paginated on (Bookmark.created_at, Bookmark.id) in the database,
+    so a page reads only its own rows whatever the size of the user's history; the next
+    page's cursor is returned in the X-Next-Cursor header.
+    """
     if current_user:
-        bookmarks = db.query(Bookmark).filter(
-            Bookmark.user_id == current_user.id
-        ).all()
+        owner = Bookmark.user_id == current_user.id
     elif session_id:
-        bookmarks = db.query(Bookmark).filter(
-            Bookmark.client_session_id == session_id
-        ).all()
+        owner = Bookmark.client_session_id == session_id
     else:
-        return []
-    
-    if not bookmarks:
-        return []
-    
-    # Get poll IDs from bookmarks
-    poll_ids = [bookmark.poll_id for bookmark in bookmarks]
-    
-    # Fetch polls
-    polls = db.query(Poll).filter(
-        Poll.id.in_(poll_ids)
-    ).order_by(Poll.created_at.desc()).offset(skip).limit(limit).all()
+        return FastJSONResponse([])
     
-    # Build response
-    result = []
-    for poll in polls:
-        total_votes = db.query(func.count(Vote.id)).filter(Vote.poll_id == poll.id).scalar()
-        bookmark_count = db.query(func.count(Bookmark.id)).filter(Bookmark.poll_id == poll.id).scalar()
-        option_count = len(poll.options)
-        
-        # Include options with vote counts for visual display
-        options_response = [
-            OptionResponse(
-                id=option.id,
-                text=option.text,
-                vote_count=option.vote_count
-            )
-            for option in poll.options
-        ]
-        
-        result.append(PollListResponse(
-            id=poll.id,
-            title=poll.title,
-            description=poll.description,
-            creator_id=poll.creator_id,
-            created_at=poll.created_at,
-            expires_at=poll.expires_at,
-            total_votes=total_votes or 0,
-            bookmark_count=bookmark_count or 0,
-            option_count=option_count,
-            options=options_response,
-            user_has_bookmarked=True,  # Always true in bookmarks view
-            tags=[
-                TagResponse(
-                    id=tag.id,
-                    name=tag.name,
-                    slug=tag.slug,
-                    description=tag.description,
-                    created_at=tag.created_at
-                )
-                for tag in poll.tags
-            ]
-        ))
+    query = select(Poll, Bookmark.created_at, Bookmark.id).join(
+        Bookmark, Bookmark.poll_id == Poll.id
+    ).where(owner).options(*POLL_LIST_LOADERS).order_by(*keyset_order(Bookmark.created_at, Bookmark.id))
+    if cursor:
+        try:
+            after_key, after_id = decode_cursor(cursor, "bookmarked")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(keyset_filter(Bookmark.created_at, Bookmark.id, after_key, after_id))
+    elif skip:
+        query = query.offset(skip)
+    rows, has_more = split_page((await db.execute(query.limit(limit + 1))).all(), limit)
+    next_cursor = None
+    if has_more:
+        _, last_bookmarked_at, last_bookmark_id = rows[-1]
+        next_cursor = encode_cursor("bookmarked", last_bookmarked_at, last_bookmark_id)
+    polls = [poll for poll, _, _ in rows]
     
-    return result
+    result = await build_poll_list(db, polls, current_user, session_id, include_options=True)
+    return FastJSONResponse(result, headers=next_cursor_headers(next_cursor))
 
 @router.post("/{poll_id}/bookmark", response_model=BookmarkResponse)
 async def toggle_bookmark(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
     """Toggle bookmark on a poll"""
     # Verify poll exists
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    poll = await db.get(Poll, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Check if user already bookmarked
     existing_bookmark = None
     if current_user:
-        existing_bookmark = db.query(Bookmark).filter(
+        existing_bookmark = await db.scalar(select(Bookmark).where(
             Bookmark.poll_id == poll_id,
             Bookmark.user_id == current_user.id
-        ).first()
+        ).limit(1))
     elif session_id:
-        existing_bookmark = db.query(Bookmark).filter(
+        existing_bookmark = await db.scalar(select(Bookmark).where(
             Bookmark.poll_id == poll_id,
             Bookmark.client_session_id == session_id
-        ).first()
+        ).limit(1))
     else:
         raise HTTPException(status_code=400, detail="User identification required")
     
     user_has_bookmarked = False
     if existing_bookmark:
         # Remove bookmark
-        db.delete(existing_bookmark)
+        await db.delete(existing_bookmark)
+        poll.bookmark_count = Poll.bookmark_count - 1
+        poll.version = Poll.version + 1
         user_has_bookmarked = False
     else:
         # Add bookmark
@@ -127,12 +100,15 @@ async def toggle_bookmark(
             client_session_id=session_id if not current_user else None
         )
         db.add(new_bookmark)
+        poll.bookmark_count = Poll.bookmark_count + 1
+        poll.version = Poll.version + 1
         user_has_bookmarked = True
     
-    db.commit()
+    await db.commit()
     
-    # Get updated bookmark count
-    bookmark_count = db.query(func.count(Bookmark.id)).filter(Bookmark.poll_id == poll_id).scalar()
+    # Updated bookmark count (reloaded after commit)
+    await db.refresh(poll, ["bookmark_count"])
+    bookmark_count = poll.bookmark_count
     
     # Broadcast bookmark update via WebSocket
     await manager.broadcast_to_poll(
@@ -153,32 +129,31 @@ async def toggle_bookmark(
 @router.get("/{poll_id}/bookmarks", response_model=BookmarkResponse)
 async def get_bookmarks(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
     """Get bookmark count and user's bookmark status for a poll"""
     # Verify poll exists
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    poll = await db.get(Poll, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
-    # Get bookmark count
-    bookmark_count = db.query(func.count(Bookmark.id)).filter(Bookmark.poll_id == poll_id).scalar()
+    bookmark_count = poll.bookmark_count
     
     # Check if user has bookmarked
     user_has_bookmarked = False
     if current_user:
-        bookmark = db.query(Bookmark).filter(
+        bookmark = await db.scalar(select(Bookmark.id).where(
             Bookmark.poll_id == poll_id,
             Bookmark.user_id == current_user.id
-        ).first()
+        ).limit(1))
         user_has_bookmarked = bookmark is not None
     elif session_id:
-        bookmark = db.query(Bookmark).filter(
+        bookmark = await db.scalar(select(Bookmark.id).where(
             Bookmark.poll_id == poll_id,
             Bookmark.client_session_id == session_id
-        ).first()
+        ).limit(1))
         user_has_bookmarked = bookmark is not None
     
     return BookmarkResponse(
@@ -1,58 +1,191 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import exists, false, select
 from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime, timezone, timedelta
 
 from models import get_db, User, Poll, Option, Vote, Bookmark, Tag
-from schemas import PollCreate, PollResponse, PollListResponse, OptionResponse, TagResponse
+from schemas import PollCreate, PollResponse, PollListResponse
 from auth.dependencies import get_current_user, get_current_user_required, get_client_session_id
 from websocket.manager import manager
+from cache import (
+    cache, timeseries_cache, poll_timeseries_cache_key, polls_list_cache_key, invalidate_poll_caches, invalidate_poll_lists,
+    POLLS_LIST_GENERATION_KEY, POLLS_LIST_TTL, TIMESERIES_TTL_ACTIVE, TIMESERIES_TTL_CLOSED,
+)
+from services.rollups import ROLLUP_GRANULARITIES, load_rollup_events, load_rollup_events_for_polls
+from services.aggregation import load_bucketed_events, load_bucketed_events_for_polls
+from services.timeseries import build_timeseries, events_to_arrays
+from services.vote_buffer import vote_buffers
+from services.search import apply_search
+from services.serialization import FastJSONResponse, poll_payload
+from services.poll_lists import POLL_LIST_LOADERS, build_poll_list, caller_filters, with_user_flags
+from services.etags import make_etag, etag_matches, etag_headers, not_modified
+from services.pagination import next_cursor_headers, encode_cursor, decode_cursor, keyset_order, keyset_filter, split_page
 
 router = APIRouter(prefix="/api/polls", tags=["polls"])
 
-_timeseries_cache: Dict[Tuple[str, int, str, Optional[str], Optional[str]], Tuple[float, Dict[str, Any]]] = {}
-
-def _apply_moving_average(values: List[float], window: int) -> List[float]:
-    if window <= 1 or not values:
-        return values
-    half = window // 2
-    smoothed: List[float] = []
-    for i in range(len(values)):
-        start = max(0, i - half)
-        end = min(len(values), i + half + 1)
-        segment = values[start:end]
-        smoothed.append(sum(segment) / len(segment))
-    return smoothed
-
-def _apply_ema(values: List[float], window: int) -> List[float]:
-    if window <= 1 or not values:
-        return values
-    alpha = 2 / (window + 1)
-    result: List[float] = []
-    prev = values[0]
-    for v in values:
-        prev = alpha * v + (1 - alpha) * prev
-        result.append(prev)
-    return result
+MAX_SPARKLINE_POLLS = 100
+
+# Candidate samples per output point for downsample=lttb
+LTTB_OVERSAMPLE = 10
+
+# Negotiated timeseries formats (see get_poll_timeseries)
+COLUMNAR_MEDIA_TYPE = "application/vnd.quickpoll.columnar+json"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+def _sample_times(start_time: datetime, end_time: datetime, points: int) -> Tuple[List[datetime], float]:
+    """Evenly spaced sample timestamps over [start_time, end_time] and the step in seconds"""
+    total_seconds = (end_time - start_time).total_seconds()
+    step = total_seconds / (points - 1) if points > 1 else total_seconds
+    return [start_time + timedelta(seconds=step * i) for i in range(points)], step
+
+def _build_timeseries(
+    options: List[Option],
+    events: List[Tuple[float, str, int]],
+    ts_list: List[datetime],
+    metric: str,
+    smooth: Optional[str] = None,
+    window: int = 3,
+) -> Dict[str, Any]:
+    """Turn time-ordered (epoch, option id, count) events into the timeseries response"""
+    option_ids = [str(opt.id) for opt in options]
+    id_to_label = {str(opt.id): opt.text for opt in options}
+    epochs, option_idx, weights = events_to_arrays(events, option_ids)
+    return build_timeseries(option_ids, id_to_label, epochs, option_idx, weights, ts_list, metric, smooth, window)
+
+def _poll_etag(poll_id: UUID, version: int, user_has_voted: bool, user_has_bookmarked: bool) -> str:
+    return make_etag("poll", str(poll_id), version, bool(user_has_voted), bool(user_has_bookmarked))
+
+def _list_page_response(items: List[Dict[str, Any]], page_etag: str, next_cursor: Optional[str], if_none_match: Optional[str]):
+    """The page, or 304 if the caller already holds it with the same voted/bookmarked flags"""
+    flags = [
+        (str(item["id"]), item["user_has_voted"], item["user_has_bookmarked"])
+        for item in items
+        if item["user_has_voted"] or item["user_has_bookmarked"]
+    ]
+    etag = make_etag(page_etag, flags)
+    headers = next_cursor_headers(next_cursor)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, per_caller=True, headers=headers)
+    return FastJSONResponse(items, headers={**headers, **etag_headers(etag, per_caller=True)})
+
+def _negotiate_timeseries_format(accept: Optional[str]) -> str:
+    """Pick a timeseries format from the Accept header; today's shape is the default.
+
+    The supported type with the highest q-value wins (q=0 rules a type out); ties and
+    wildcards go to JSON.
+    """
+    if not accept:
+        return "series"
+    formats = {
+        "application/json": "series",
+        COLUMNAR_MEDIA_TYPE: "columnar",
+        BINARY_MEDIA_TYPE: "binary",
+    }
+    best, best_q = "series", 0.0
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        fmt = formats.get(media_type.lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q or (q == best_q and fmt == "series"):
+            best, best_q = fmt, q
+    return best
+
+def _timeseries_response(body: Any, fmt: str):
+    if fmt == "binary":
+        return Response(content=body, media_type=BINARY_MEDIA_TYPE, headers={"Vary": "Accept"})
+    if fmt == "columnar":
+        return JSONResponse(content=body, media_type=COLUMNAR_MEDIA_TYPE, headers={"Vary": "Accept"})
+    # The format follows the Accept header, so shared caches must key every format on it
+    return JSONResponse(content=body, headers={"Vary": "Accept"})
+
+@router.get("/sparklines")
+async def get_poll_sparklines(
+    ids: List[UUID] = Query(..., description="Poll IDs; repeat the parameter for each poll"),
+    db: AsyncSession = Depends(get_db),
+    points: int = Query(40, ge=10, le=200),
+    metric: str = Query("percent", pattern="^(percent|count)$"),
+):
+    """Return the whole-lifetime timeseries for many polls in one response.
+    Response shape:
+      { "<poll_id>": { "series": [...], "meta": {...} } }  (same per-poll shape as /{poll_id}/timeseries)
+    Unknown poll IDs are omitted.
+    """
+    if len(ids) > MAX_SPARKLINE_POLLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SPARKLINE_POLLS} polls per request")
+
+    polls = (await db.scalars(select(Poll).options(selectinload(Poll.options)).where(Poll.id.in_(set(ids))))).all()
+
+    now = datetime.now(timezone.utc)
+    sample_times: Dict[UUID, List[datetime]] = {}
+    end_times: Dict[UUID, datetime] = {}
+    steps: Dict[UUID, float] = {}
+    for poll in polls:
+        end_time = now
+        if poll.expires_at and poll.expires_at < end_time:
+            end_time = poll.expires_at
+        start_time = poll.created_at
+        if start_time >= end_time:
+            start_time = end_time - timedelta(seconds=points - 1)
+        sample_times[poll.id], steps[poll.id] = _sample_times(start_time, end_time, points)
+        end_times[poll.id] = end_time
+
+    # Same rule as get_poll_timeseries: rollups once a step spans a whole minute, grouped
+    # SQL below that. Each side is one statement for every poll on the page.
+    rollup_steps = {poll_id: step for poll_id, step in steps.items() if step >= ROLLUP_GRANULARITIES[0][1]}
+    events_by_poll = await load_rollup_events_for_polls(db, rollup_steps)
+    events_by_poll.update(await load_bucketed_events_for_polls(db, {
+        poll_id: (sample_times[poll_id], end_times[poll_id])
+        for poll_id in steps
+        if poll_id not in rollup_steps
+    }))
+
+    return {
+        str(poll.id): _build_timeseries(poll.options, events_by_poll.get(poll.id, []), sample_times[poll.id], metric)
+        for poll in polls
+    }
 
 @router.get("/{poll_id}/timeseries")
 async def get_poll_timeseries(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     points: int = Query(120, ge=10, le=200),
     metric: str = Query("percent", pattern="^(percent|count)$"),
     from_ts: Optional[str] = Query(None, alias="from"),
     to_ts: Optional[str] = Query(None, alias="to"),
     smooth: Optional[str] = Query(None, pattern="^(ma|ema)$"),
     window: int = Query(3, ge=2, le=25),
+    source: Optional[str] = Query(None, pattern="^(rollup|sql)$"),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(series|columnar|binary)$"),
+    downsample: Optional[str] = Query(None, pattern="^lttb$"),
+    accept: Optional[str] = Header(None),
 ):
     """Return sampled timeseries for a poll options: each option's count/percent over time.
     Response shape:
       { "series": [{ id, label, data: [{x,y}] }], "meta": { optionIdToLabel, optionIdToColor } }
+    source: 'rollup' reads pre-aggregated buckets, 'sql' has the database count votes
+    per sample (exact). By default live polls are served from the in-memory vote
+    buffer; otherwise rollups serve steps of a minute or more and SQL aggregation
+    serves finer, zoomed-in ranges.
+    format (or Accept header): 'columnar' (application/vnd.quickpoll.columnar+json) returns one shared
+    epoch-second x array plus a y array per option; 'binary' (application/octet-stream)
+    returns the same data packed (see services.timeseries.pack_binary).
+    downsample=lttb samples a grid LTTB_OVERSAMPLE times denser and keeps the `points`
+    samples that best preserve the chart's shape, so short bursts survive at any zoom.
     """
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    poll = await db.scalar(select(Poll).options(selectinload(Poll.options)).where(Poll.id == poll_id))
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
@@ -79,377 +212,267 @@ async def get_poll_timeseries(
         # Degenerate range; return flat zeros
         start_time = end_time - timedelta(seconds=points - 1)
 
+    # Response format: explicit query flag first, then the Accept header
+    if fmt is None:
+        fmt = _negotiate_timeseries_format(accept)
+
     # Cache key
-    cache_key = (str(poll_id), points, metric, from_ts, to_ts)
-    now_epoch = datetime.now(timezone.utc).timestamp()
-    cached = _timeseries_cache.get(cache_key)
-    if cached and now_epoch - cached[0] < 5:
-        return cached[1]
+    cache_key = poll_timeseries_cache_key(str(poll_id), points, metric, from_ts, to_ts, smooth, window, source, fmt, downsample)
+    cached = timeseries_cache.get(cache_key)
+    if cached is not None:
+        return _timeseries_response(cached, fmt)
 
-    # Prepare options
+    # Build sample timestamps
+    # LTTB picks its output from a denser grid; every data source reads at that resolution
+    sample_count = points * LTTB_OVERSAMPLE if downsample == "lttb" else points
+    ts_list, step = _sample_times(start_time, end_time, sample_count)
     options = poll.options
     option_ids = [str(opt.id) for opt in options]
     id_to_label = {str(opt.id): opt.text for opt in options}
+    is_closed = poll.expires_at is not None and poll.expires_at <= datetime.now(timezone.utc)
 
-    # Fetch votes ordered by time
-    votes = db.query(Vote).filter(Vote.poll_id == poll_id).order_by(Vote.created_at.asc()).all()
+    buffer = None
+    if source is None and not is_closed:
+        # Live polls are served from this worker's in-memory vote events
+        buffer = await vote_buffers.get(db, poll_id, option_ids, poll.total_votes or 0)
 
-    # Build sample timestamps
-    total_seconds = (end_time - start_time).total_seconds()
-    step = total_seconds / (points - 1) if points > 1 else total_seconds
-    ts_list: List[datetime] = [start_time + timedelta(seconds=step * i) for i in range(points)]
-
-    # Cumulative counts per option at each sample
-    counts = {opt_id: 0 for opt_id in option_ids}
-    series_counts: Dict[str, List[int]] = {opt_id: [0] * points for opt_id in option_ids}
-    vote_idx = 0
-    for i, t in enumerate(ts_list):
-        while vote_idx < len(votes) and votes[vote_idx].created_at <= t:
-            counts[str(votes[vote_idx].option_id)] = counts.get(str(votes[vote_idx].option_id), 0) + 1
-            vote_idx += 1
-        for opt_id in option_ids:
-            series_counts[opt_id][i] = counts.get(opt_id, 0)
-
-    # Convert to metric
-    series_data: List[Dict[str, Any]] = []
-    for opt_id in option_ids:
-        values = [float(v) for v in series_counts[opt_id]]
-        if metric == "percent":
-            totals = [sum(series_counts[oid][i] for oid in option_ids) for i in range(points)]
-            percents = [ (values[i] / totals[i] * 100.0) if totals[i] > 0 else 0.0 for i in range(points) ]
-            values = percents
-        # Smoothing
-        if smooth == "ma":
-            values = _apply_moving_average(values, window)
-        elif smooth == "ema":
-            values = _apply_ema(values, window)
-        series_data.append({
-            "id": id_to_label.get(opt_id, opt_id),
-            "label": id_to_label.get(opt_id, opt_id),
-            "data": [{"x": ts_list[i].isoformat(), "y": round(values[i], 4)} for i in range(points)]
-        })
-
-    response = {
-        "series": series_data,
-        "meta": {
-            "optionIdToLabel": id_to_label,
-        }
-    }
-    _timeseries_cache[cache_key] = (now_epoch, response)
-    return response
+    if buffer is not None:
+        epochs, option_idx = buffer.arrays(option_ids)
+        weights = None
+    else:
+        if source is None:
+            source = "rollup" if step >= ROLLUP_GRANULARITIES[0][1] else "sql"
+        if source == "rollup":
+            # Read pre-aggregated buckets (ordered by time) instead of every vote row
+            events = await load_rollup_events(db, poll_id, start_time, end_time, step)
+        else:
+            # Let the database bucket votes per sample; only points x options rows come back
+            events = await load_bucketed_events(db, poll_id, ts_list, end_time)
+        epochs, option_idx, weights = events_to_arrays(events, option_ids)
+
+    response = build_timeseries(
+        option_ids, id_to_label, epochs, option_idx, weights, ts_list, metric, smooth, window, fmt,
+        downsample_to=points if downsample == "lttb" else None,
+    )
+    # Closed polls can no longer change, so keep their series much longer
+    ttl = TIMESERIES_TTL_CLOSED if is_closed else TIMESERIES_TTL_ACTIVE
+    timeseries_cache.set(cache_key, response, ttl=ttl, tag=str(poll_id))
+    return _timeseries_response(response, fmt)
 
 @router.get("/mine", response_model=List[PollListResponse])
 async def list_my_polls(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user_required),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
-    """List polls created by the current authenticated user"""
-    polls = db.query(Poll).filter(Poll.creator_id == current_user.id).order_by(Poll.created_at.desc()).offset(skip).limit(limit).all()
+    """List polls created by the current authenticated user, newest first (keyset-paginated)"""
+    query = select(Poll).options(*POLL_LIST_LOADERS).where(
+        Poll.creator_id == current_user.id
+    ).order_by(*keyset_order(Poll.created_at, Poll.id))
+    if cursor:
+        try:
+            after_key, after_id = decode_cursor(cursor, "newest")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(keyset_filter(Poll.created_at, Poll.id, after_key, after_id))
+    elif skip:
+        query = query.offset(skip)
+    polls, has_more = split_page((await db.scalars(query.limit(limit + 1))).all(), limit)
+    next_cursor = encode_cursor("newest", polls[-1].created_at, polls[-1].id) if has_more else None
 
-    result = []
-    for poll in polls:
-        total_votes = db.query(func.count(Vote.id)).filter(Vote.poll_id == poll.id).scalar()
-        bookmark_count = db.query(func.count(Bookmark.id)).filter(Bookmark.poll_id == poll.id).scalar()
-        option_count = len(poll.options)
-
-        # Check if current user has bookmarked this poll
-        user_has_bookmarked = db.query(Bookmark).filter(
-            Bookmark.poll_id == poll.id,
-            Bookmark.user_id == current_user.id
-        ).first() is not None
-
-        # Include options with vote counts for visual display
-        options_response = [
-            OptionResponse(
-                id=option.id,
-                text=option.text,
-                vote_count=option.vote_count
-            )
-            for option in poll.options
-        ]
-
-        result.append(PollListResponse(
-            id=poll.id,
-            title=poll.title,
-            description=poll.description,
-            creator_id=poll.creator_id,
-            created_at=poll.created_at,
-            expires_at=poll.expires_at,
-            total_votes=total_votes or 0,
-            bookmark_count=bookmark_count or 0,
-            option_count=option_count,
-            options=options_response,
-            user_has_bookmarked=user_has_bookmarked,
-            tags=[
-                TagResponse(
-                    id=tag.id,
-                    name=tag.name,
-                    slug=tag.slug,
-                    description=tag.description,
-                    created_at=tag.created_at
-                )
-                for tag in poll.tags
-            ]
-        ))
-    return result
+    result = await build_poll_list(db, polls, current_user, include_options=True)
+    return FastJSONResponse(result, headers=next_cursor_headers(next_cursor))
 
 # backend/routers/polls.py
 @router.get("", response_model=List[PollListResponse])
 async def list_polls(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user),
+    session_id: Optional[str] = Depends(get_client_session_id),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,  # Opaque cursor from a previous page's X-Next-Cursor header
     search: Optional[str] = None,
     status: Optional[str] = None,  # 'active', 'closed', or None for all
     tag: Optional[str] = None,  # Filter by tag slug
-    sort: Optional[str] = None  # 'newest', 'oldest', 'most_voted', 'trending'
+    sort: Optional[str] = None,  # 'newest', 'oldest', 'most_voted', 'trending', 'relevance'
+    if_none_match: Optional[str] = Header(None)
 ):
-    """List all polls with optional search, filter, and sort"""
-    query = db.query(Poll)
+    """List all polls with optional search, filter, and sort.
+
+    Pages are built by services.poll_lists: a page costs three statements regardless of
+    its size, plus one each for the caller's voted and bookmarked flags.
+    search is a ranked full-text, prefix-matching query (see services.search);
+    sort=relevance orders by its rank and behaves like newest without a search.
+    Pages are keyset-paginated on (created_at, id), or (score, id) for most_voted,
+    trending and relevance; the next page's cursor is returned in the X-Next-Cursor header.
+    Pages are cached for POLLS_LIST_TTL under the current list generation (see cache.py).
+    The ETag covers each listed poll's version, the next cursor and the caller's flags, so a
+    matching If-None-Match on a cached page is answered with 304 without touching the page.
+    """
+    generation = await cache.aget_generation(POLLS_LIST_GENERATION_KEY)
+    if generation is not None:
+        cache_key = polls_list_cache_key(
+            generation, skip, limit, cursor=cursor, search=search, status=status, tag=tag, sort=sort
+        )
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            items = await with_user_flags(db, cached["items"], current_user, session_id)
+            return _list_page_response(items, cached["etag"], cached["next_cursor"], if_none_match)
+    
+    query = select(Poll).options(*POLL_LIST_LOADERS)
     
     # Apply search filter
+    relevance_col = None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Poll.title.ilike(search_term)) | 
-            (Poll.description.ilike(search_term))
-        )
+        query, relevance_col = await apply_search(db, query, search)
     
     # Apply status filter
     if status == 'active':
-        query = query.filter(
+        query = query.where(
             (Poll.expires_at.is_(None)) | 
             (Poll.expires_at > datetime.now(timezone.utc))
         )
     elif status == 'closed':
-        query = query.filter(
+        query = query.where(
             (Poll.expires_at.isnot(None)) & 
             (Poll.expires_at <= datetime.now(timezone.utc))
         )
     
     # Apply tag filter
     if tag:
-        query = query.join(Poll.tags).filter(Tag.slug == tag)
+        query = query.join(Poll.tags).where(Tag.slug == tag)
     
-    # Apply sorting
-    if sort == 'oldest':
-        query = query.order_by(Poll.created_at.asc())
-    elif sort == 'most_voted':
-        # Subquery to count votes per poll
-        vote_count_subq = db.query(
-            Vote.poll_id,
-            func.count(Vote.id).label('vote_count')
-        ).group_by(Vote.poll_id).subquery()
-        
-        query = query.outerjoin(
-            vote_count_subq, 
-            Poll.id == vote_count_subq.c.poll_id
-        ).order_by(func.coalesce(vote_count_subq.c.vote_count, 0).desc())
+    # Sort key and direction; ties are broken on Poll.id
+    sort = sort if sort in ('oldest', 'most_voted', 'trending', 'relevance') else 'newest'
+    if sort == 'relevance' and relevance_col is None:
+        sort = 'newest'
+    if sort == 'most_voted':
+        sort_col, descending = Poll.total_votes, True
     elif sort == 'trending':
-        # Trending: most votes in last 24 hours
-        recent_time = datetime.now(timezone.utc) - timedelta(hours=24)
-        vote_count_subq = db.query(
-            Vote.poll_id,
-            func.count(Vote.id).label('recent_vote_count')
-        ).filter(Vote.created_at >= recent_time).group_by(Vote.poll_id).subquery()
-        
-        query = query.outerjoin(
-            vote_count_subq,
-            Poll.id == vote_count_subq.c.poll_id
-        ).order_by(func.coalesce(vote_count_subq.c.recent_vote_count, 0).desc())
-    else:  # Default: newest
-        query = query.order_by(Poll.created_at.desc())
+        # Time-decayed vote score maintained by services.trending
+        sort_col, descending = Poll.trending_score, True
+    elif sort == 'relevance':
+        sort_col, descending = relevance_col, True
+    else:
+        sort_col, descending = Poll.created_at, sort == 'newest'
     
-    polls = query.offset(skip).limit(limit).all()
+    # Apply sorting and pagination
+    query = query.add_columns(sort_col.label('sort_key'))
+    query = query.order_by(*keyset_order(sort_col, Poll.id, descending))
+    if cursor:
+        try:
+            after_key, after_id = decode_cursor(cursor, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(keyset_filter(sort_col, Poll.id, after_key, after_id, descending))
+    elif skip:
+        query = query.offset(skip)
     
-    result = []
-    for poll in polls:
-        total_votes = db.query(func.count(Vote.id)).filter(Vote.poll_id == poll.id).scalar()
-        bookmark_count = db.query(func.count(Bookmark.id)).filter(Bookmark.poll_id == poll.id).scalar()
-        option_count = len(poll.options)
-        
-        result.append(PollListResponse(
-            id=poll.id,
-            title=poll.title,
-            description=poll.description,
-            creator_id=poll.creator_id,
-            created_at=poll.created_at,
-            expires_at=poll.expires_at,
-            total_votes=total_votes or 0,
-            bookmark_count=bookmark_count or 0,
-            option_count=option_count,
-            tags=[
-                TagResponse(
-                    id=tag.id,
-                    name=tag.name,
-                    slug=tag.slug,
-                    description=tag.description,
-                    created_at=tag.created_at
-                )
-                for tag in poll.tags
-            ]
-        ))
+    rows, has_more = split_page((await db.execute(query.limit(limit + 1))).all(), limit)
+    next_cursor = None
+    if has_more:
+        last_poll, last_key = rows[-1]
+        next_cursor = encode_cursor(sort, last_key, last_poll.id)
     
-    return result
+    # The cached page is caller-independent; flags are overlaid per request
+    polls = [poll for poll, _ in rows]
+    result = await build_poll_list(db, polls)
+    page_etag = make_etag("polls", [(str(poll.id), poll.version) for poll in polls], next_cursor)
+    
+    if generation is not None:
+        await cache.aset(
+            cache_key, {"items": result, "next_cursor": next_cursor, "etag": page_etag}, ttl=POLLS_LIST_TTL
+        )
+    
+    result = await with_user_flags(db, result, current_user, session_id)
+    return _list_page_response(result, page_etag, next_cursor, if_none_match)
 
 @router.get("/{poll_id}", response_model=PollResponse)
 async def get_poll(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
-    session_id: Optional[str] = Depends(get_client_session_id)
+    session_id: Optional[str] = Depends(get_client_session_id),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get poll details with options and vote counts"""
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
-    if not poll:
-        raise HTTPException(status_code=404, detail="Poll not found")
-    
-    # Check if poll is expired
-    if poll.expires_at and poll.expires_at < datetime.now(timezone.utc):
-        is_expired = True
+    """Get poll details with options and vote counts.
+
+    Two statements: the poll with its options joined and the caller's voted/bookmarked
+    flags as EXISTS columns, then its tags. Counts are the denormalized Poll columns.
+    The ETag is derived from Poll.version and the caller's flags; a matching If-None-Match
+    is answered with 304 after a single-row lookup of just those values.
+    """
+    filters = caller_filters(current_user, session_id)
+    if filters:
+        voter, bookmarker = filters
+        voted = exists().where(Vote.poll_id == poll_id, voter)
+        bookmarked = exists().where(Bookmark.poll_id == poll_id, bookmarker)
     else:
-        is_expired = False
-    
-    # Get vote counts for options
-    options_response = [
-        OptionResponse(
-            id=option.id,
-            text=option.text,
-            vote_count=option.vote_count
-        )
-        for option in poll.options
-    ]
+        voted = bookmarked = false()
+    if if_none_match:
+        stamp = (await db.execute(select(Poll.version, voted, bookmarked).where(Poll.id == poll_id))).one_or_none()
+        if stamp is None:
+            raise HTTPException(status_code=404, detail="Poll not found")
+        etag = _poll_etag(poll_id, *stamp)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, per_caller=True)
     
-    # Check if user has voted
-    user_has_voted = False
-    if current_user:
-        vote = db.query(Vote).filter(
-            Vote.poll_id == poll_id,
-            Vote.user_id == current_user.id
-        ).first()
-        user_has_voted = vote is not None
-    elif session_id:
-        vote = db.query(Vote).filter(
-            Vote.poll_id == poll_id,
-            Vote.client_session_id == session_id
-        ).first()
-        user_has_voted = vote is not None
-    
-    # Check if user has bookmarked
-    user_has_bookmarked = False
-    if current_user:
-        bookmark = db.query(Bookmark).filter(
-            Bookmark.poll_id == poll_id,
-            Bookmark.user_id == current_user.id
-        ).first()
-        user_has_bookmarked = bookmark is not None
-    elif session_id:
-        bookmark = db.query(Bookmark).filter(
-            Bookmark.poll_id == poll_id,
-            Bookmark.client_session_id == session_id
-        ).first()
-        user_has_bookmarked = bookmark is not None
-    
-    # Get bookmark count and total votes
-    bookmark_count = db.query(func.count(Bookmark.id)).filter(Bookmark.poll_id == poll_id).scalar()
-    total_votes = db.query(func.count(Vote.id)).filter(Vote.poll_id == poll_id).scalar()
+    result = await db.execute(
+        select(Poll, voted.label("user_has_voted"), bookmarked.label("user_has_bookmarked")).options(
+            joinedload(Poll.options),
+            selectinload(Poll.tags),
+        ).where(Poll.id == poll_id)
+    )
+    row = result.unique().one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Poll not found")
     
-    return PollResponse(
-        id=poll.id,
-        title=poll.title,
-        description=poll.description,
-        creator_id=poll.creator_id,
-        expires_at=poll.expires_at,
-        created_at=poll.created_at,
-        options=options_response,
-        bookmark_count=bookmark_count or 0,
-        total_votes=total_votes or 0,
-        user_has_voted=user_has_voted,
-        user_has_bookmarked=user_has_bookmarked,
-        tags=[
-            TagResponse(
-                id=tag.id,
-                name=tag.name,
-                slug=tag.slug,
-                description=tag.description,
-                created_at=tag.created_at
-            )
-            for tag in poll.tags
-        ]
+    poll, user_has_voted, user_has_bookmarked = row
+    etag = _poll_etag(poll.id, poll.version, user_has_voted, user_has_bookmarked)
+    return FastJSONResponse(
+        poll_payload(poll, bool(user_has_voted), bool(user_has_bookmarked)),
+        headers=etag_headers(etag, per_caller=True),
     )
 
 @router.post("", response_model=PollResponse, status_code=status.HTTP_201_CREATED)
 async def create_poll(
     poll_data: PollCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
     """Create a new poll (authenticated users only)"""
-    # Create poll
+    # Resolve tags if provided
+    tags = []
+    if poll_data.tag_ids:
+        tags = list((await db.scalars(select(Tag).where(Tag.id.in_(poll_data.tag_ids)))).all())
+    
+    # Create poll with its options and tags; one flush inserts them all
     new_poll = Poll(
         title=poll_data.title,
         description=poll_data.description,
         creator_id=current_user.id,
-        expires_at=poll_data.expires_at
+        expires_at=poll_data.expires_at,
+        options=[Option(text=option_data.text, vote_count=0) for option_data in poll_data.options],
+        tags=tags,
     )
     db.add(new_poll)
-    db.flush()  # Get poll ID without committing
-    
-    # Create options
-    for option_data in poll_data.options:
-        option = Option(
-            poll_id=new_poll.id,
-            text=option_data.text,
-            vote_count=0
-        )
-        db.add(option)
-    
-    # Add tags if provided
-    if poll_data.tag_ids:
-        tags = db.query(Tag).filter(Tag.id.in_(poll_data.tag_ids)).all()
-        new_poll.tags = tags
-    
-    db.commit()
-    db.refresh(new_poll)
+    await db.commit()
+    await invalidate_poll_lists()
     
     # Return poll response
-    return PollResponse(
-        id=new_poll.id,
-        title=new_poll.title,
-        description=new_poll.description,
-        creator_id=new_poll.creator_id,
-        expires_at=new_poll.expires_at,
-        created_at=new_poll.created_at,
-        options=[
-            OptionResponse(id=opt.id, text=opt.text, vote_count=opt.vote_count)
-            for opt in new_poll.options
-        ],
-        bookmark_count=0,
-        total_votes=0,
-        user_has_voted=False,
-        user_has_bookmarked=False,
-        tags=[
-            TagResponse(
-                id=tag.id,
-                name=tag.name,
-                slug=tag.slug,
-                description=tag.description,
-                created_at=tag.created_at
-            )
-            for tag in new_poll.tags
-        ]
-    )
+    return FastJSONResponse(poll_payload(new_poll), status_code=status.HTTP_201_CREATED)
 
 @router.delete("/{poll_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_poll(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
     """Delete a poll (owner only)"""
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
+    poll = await db.get(Poll, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
@@ -459,8 +482,11 @@ async def delete_poll(
             detail="Not authorized to delete this poll"
         )
     
-    db.delete(poll)
-    db.commit()
+    await db.delete(poll)
+    await db.commit()
+    timeseries_cache.invalidate_tag(str(poll_id))
+    vote_buffers.evict(poll_id)
+    await invalidate_poll_caches(str(poll_id))
     # Broadcast deletion to specific poll channel and global list channel
     await manager.broadcast_to_poll(str(poll_id), {"type": "poll_deleted", "poll_id": str(poll_id)})
     return None
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Header
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
 import re
 
-from models import get_db, Tag
+from models import get_db, Poll, Tag
+from models.tag import poll_tags
 from schemas import TagCreate, TagResponse
 from auth.dependencies import get_current_user_required
+from services.serialization import FastJSONResponse, tag_payload
+from services.etags import make_etag, etag_matches, etag_headers, not_modified
+from cache import cache, tags_cache_key, invalidate_poll_lists, invalidate_tags, TAGS_GENERATION_KEY, TAGS_TTL
 
 router = APIRouter(prefix="/api/tags", tags=["tags"])
 
@@ -19,21 +24,40 @@ def slugify(text: str) -> str:
 
 @router.get("", response_model=List[TagResponse])
 async def list_tags(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """List all available tags"""
-    tags = db.query(Tag).order_by(Tag.name).offset(skip).limit(limit).all()
-    return tags
+    """List all available tags (cached; create/delete bump the tags generation).
+
+    The ETag is a digest of the page, stored with the cached entry, so a matching
+    If-None-Match is answered with 304 straight from the cache.
+    """
+    generation = await cache.aget_generation(TAGS_GENERATION_KEY)
+    cached = None
+    if generation is not None:
+        cache_key = tags_cache_key(generation, skip, limit)
+        cached = await cache.aget(cache_key)
+    
+    if cached is None:
+        tags = (await db.scalars(select(Tag).order_by(Tag.name).offset(skip).limit(limit))).all()
+        items = [tag_payload(tag) for tag in tags]
+        cached = {"items": items, "etag": make_etag("tags", [tuple(map(str, item.values())) for item in items])}
+        if generation is not None:
+            await cache.aset(cache_key, cached, ttl=TAGS_TTL)
+    
+    if etag_matches(if_none_match, cached["etag"]):
+        return not_modified(cached["etag"])
+    return FastJSONResponse(cached["items"], headers=etag_headers(cached["etag"]))
 
 @router.get("/{tag_id}", response_model=TagResponse)
 async def get_tag(
     tag_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific tag by ID"""
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    tag = await db.get(Tag, tag_id)
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     return tag
@@ -41,10 +65,10 @@ async def get_tag(
 @router.get("/slug/{slug}", response_model=TagResponse)
 async def get_tag_by_slug(
     slug: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific tag by slug"""
-    tag = db.query(Tag).filter(Tag.slug == slug).first()
+    tag = await db.scalar(select(Tag).where(Tag.slug == slug))
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     return tag
@@ -52,7 +76,7 @@ async def get_tag_by_slug(
 @router.post("", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 async def create_tag(
     tag_data: TagCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user_required)
 ):
     """Create a new tag (authenticated users only)"""
@@ -60,9 +84,9 @@ async def create_tag(
     slug = slugify(tag_data.name)
     
     # Check if tag with same name or slug already exists
-    existing_tag = db.query(Tag).filter(
+    existing_tag = await db.scalar(select(Tag).where(
         (Tag.name == tag_data.name) | (Tag.slug == slug)
-    ).first()
+    ).limit(1))
     
     if existing_tag:
         raise HTTPException(
@@ -77,23 +101,33 @@ async def create_tag(
         description=tag_data.description
     )
     db.add(new_tag)
-    db.commit()
-    db.refresh(new_tag)
+    await db.commit()
+    await db.refresh(new_tag)
+    await invalidate_tags()
     
     return new_tag
 
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_tag(
     tag_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user_required)
 ):
     """Delete a tag (authenticated users only)"""
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    tag = await db.get(Tag, tag_id)
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     
-    db.delete(tag)
-    db.commit()
+    # Polls carrying the tag change shape; their ETags must too
+    await db.execute(
+        update(Poll).where(
+            Poll.id.in_(select(poll_tags.c.poll_id).where(poll_tags.c.tag_id == tag_id))
+        ).values(version=Poll.version + 1).execution_options(synchronize_session=False)
+    )
+    await db.delete(tag)
+    await db.commit()
+    # Polls listed with this tag (or filtered by it) are now stale
+    await invalidate_poll_lists()
+    await invalidate_tags()
     return None
 
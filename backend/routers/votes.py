@@ -1,107 +1,217 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, Integer, String, column, exists, func, insert as sa_insert, literal, or_, select, true, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import Optional
 from uuid import UUID
 from datetime import datetime, timezone
+import uuid
 
-from models import get_db, User, Poll, Option, Vote
+from models import get_db, User, Poll, Option, Vote, VoteRollup
 from schemas import VoteCreate, VoteResponse, OptionResponse
 from auth.dependencies import get_current_user, get_client_session_id
-from websocket.manager import manager
+from services.rollups import ROLLUP_GRANULARITIES, bucket_floor, record_vote
+from services.vote_ingest import VoteIngestUnavailable, publish_votes, vote_ingest
 
 router = APIRouter(prefix="/api/polls", tags=["votes"])
 
+def _vote_source(vote: dict, now: datetime):
+    """SELECT yielding the vote's row only if its option belongs to the poll and the poll is still open"""
+    return select(*(literal(vote[name], Vote.__table__.c[name].type) for name in vote)).select_from(
+        Option
+    ).join(Poll, Poll.id == Option.poll_id).where(
+        Option.id == vote["option_id"],
+        Option.poll_id == vote["poll_id"],
+        or_(Poll.expires_at.is_(None), Poll.expires_at >= now),
+    )
+
+def _write_vote_postgresql(vote: dict, now: datetime):
+    """The whole vote write as one statement of data-modifying CTEs.
+
+    The insert skips the vote on a unique_user_vote/unique_session_vote conflict; each
+    later step reads the previous one's RETURNING rows, so the option, poll and rollup
+    rows are locked in the same order as the SQLite path and the ingest queue, and
+    nothing moves unless the vote was written. Selects the poll's (id, text, vote_count)
+    rows as of the vote, or no rows when it was rejected.
+    """
+    from sqlalchemy.dialects.postgresql import insert
+
+    inserted = insert(Vote).from_select(list(vote), _vote_source(vote, now)).on_conflict_do_nothing().returning(
+        Vote.poll_id, Vote.option_id
+    ).cte("inserted")
+    bumped_option = update(Option).where(Option.id == inserted.c.option_id).values(
+        vote_count=Option.vote_count + 1
+    ).returning(Option.id, Option.poll_id, Option.vote_count).cte("bumped_option")
+    bumped_poll = update(Poll).where(Poll.id == bumped_option.c.poll_id).values(
+        total_votes=Poll.total_votes + 1,
+        version=Poll.version + 1,
+    ).returning(Poll.id).cte("bumped_poll")
+
+    # Same buckets, in the same (primary key) order, as record_vote
+    buckets = values(
+        column("granularity", String), column("bucket_start", DateTime(timezone=True)), name="buckets"
+    ).data(sorted((name, bucket_floor(now, width)) for name, width in ROLLUP_GRANULARITIES))
+    rollups = insert(VoteRollup).from_select(
+        ["poll_id", "granularity", "bucket_start", "option_id", "vote_count"],
+        select(
+            bumped_poll.c.id,
+            buckets.c.granularity,
+            buckets.c.bucket_start,
+            literal(vote["option_id"], Vote.option_id.type),
+            literal(1, Integer),
+        ).select_from(bumped_poll.join(buckets, true())).where(bumped_poll.c.id == vote["poll_id"]),
+    )
+    rollups = rollups.on_conflict_do_update(
+        index_elements=["poll_id", "granularity", "bucket_start", "option_id"],
+        set_={"vote_count": VoteRollup.vote_count + rollups.excluded.vote_count},
+    ).cte("rolled_up")
+
+    # Sub-statements share one snapshot, so the voted option's count comes from RETURNING
+    return select(
+        Option.id, Option.text, func.coalesce(bumped_option.c.vote_count, Option.vote_count),
+    ).outerjoin(bumped_option, bumped_option.c.id == Option.id).where(
+        Option.poll_id == vote["poll_id"],
+        exists(select(bumped_poll.c.id)),
+    ).add_cte(rollups)
+
+async def _insert_vote(db: AsyncSession, vote: dict, now: datetime) -> bool:
+    """INSERT ... SELECT the vote (see _vote_source), skipping it if
+    unique_user_vote/unique_session_vote already holds a row for the caller. True when
+    the row was written."""
+    columns = list(vote)
+    source = _vote_source(vote, now)
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Databases without ON CONFLICT: let the unique constraints reject it in a savepoint
+        try:
+            async with db.begin_nested():
+                result = await db.execute(sa_insert(Vote).from_select(columns, source))
+        except IntegrityError:
+            return False
+        return result.rowcount == 1
+
+    stmt = insert(Vote).from_select(columns, source).on_conflict_do_nothing().returning(Vote.id)
+    return (await db.execute(stmt)).first() is not None
+
+# Refusal reasons shared with the group-commit queue (services.vote_ingest)
+VOTE_REJECTIONS = {
+    "poll_not_found": (404, "Poll not found"),
+    "expired": (400, "Poll has expired"),
+    "option_not_found": (404, "Option not found in this poll"),
+    "duplicate": (400, "You have already voted on this poll"),
+}
+
+def _rejected(reason: str) -> HTTPException:
+    status_code, detail = VOTE_REJECTIONS[reason]
+    return HTTPException(status_code=status_code, detail=detail)
+
+async def _rejection(db: AsyncSession, poll_id: UUID, option_id: UUID, now: datetime) -> str:
+    """Why _insert_vote wrote nothing, checked in the order the errors have always been reported"""
+    row = (await db.execute(
+        select(Poll.expires_at, exists().where(Option.id == option_id, Option.poll_id == poll_id)).where(Poll.id == poll_id)
+    )).one_or_none()
+    if row is None:
+        return "poll_not_found"
+    expires_at, option_in_poll = row
+    if expires_at and expires_at < now:
+        return "expired"
+    if not option_in_poll:
+        return "option_not_found"
+    return "duplicate"
+
 @router.post("/{poll_id}/vote", response_model=VoteResponse)
 async def submit_vote(
     poll_id: UUID,
     vote_data: VoteCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
-    """Submit a vote for a poll"""
-    # Verify poll exists
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
-    if not poll:
-        raise HTTPException(status_code=404, detail="Poll not found")
-    
-    # Check if poll is expired
-    if poll.expires_at and poll.expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=400, detail="Poll has expired")
-    
-    # Verify option belongs to poll
-    option = db.query(Option).filter(
-        Option.id == vote_data.option_id,
-        Option.poll_id == poll_id
-    ).first()
-    if not option:
-        raise HTTPException(status_code=404, detail="Option not found in this poll")
-    
-    # Check if user already voted
-    if current_user:
-        existing_vote = db.query(Vote).filter(
-            Vote.poll_id == poll_id,
-            Vote.user_id == current_user.id
-        ).first()
-        if existing_vote:
-            raise HTTPException(status_code=400, detail="You have already voted on this poll")
-    elif session_id:
-        existing_vote = db.query(Vote).filter(
-            Vote.poll_id == poll_id,
-            Vote.client_session_id == session_id
-        ).first()
-        if existing_vote:
-            raise HTTPException(status_code=400, detail="You have already voted on this poll")
-    else:
+    """Submit a vote for a poll.
+
+    The vote is inserted with ON CONFLICT DO NOTHING from a SELECT that only yields a row
+    for an open poll owning the option, so validation and the duplicate check happen in
+    the insert itself; when nothing is written one more query finds out why. Counters
+    then move by in-database increments in the same transaction, so concurrent votes
+    never overwrite each other's counts. On PostgreSQL the insert, increments, rollups
+    and the counts for the broadcast are a single statement.
+    With VOTE_GROUP_COMMIT set, the vote is instead queued and committed in a batch with
+    others (services.vote_ingest); the response still waits for that commit.
+    """
+    if not current_user and not session_id:
         raise HTTPException(status_code=400, detail="User identification required")
     
-    # Create vote
-    new_vote = Vote(
-        poll_id=poll_id,
-        option_id=vote_data.option_id,
-        user_id=current_user.id if current_user else None,
-        client_session_id=session_id if not current_user else None
-    )
+    now = datetime.now(timezone.utc)
+    vote = {
+        "id": uuid.uuid4(),
+        "poll_id": poll_id,
+        "option_id": vote_data.option_id,
+        "user_id": current_user.id if current_user else None,
+        "client_session_id": session_id if not current_user else None,
+        "created_at": now,
+    }
+    
+    if vote_ingest.enabled:
+        try:
+            reason = await vote_ingest.submit(vote)
+        except VoteIngestUnavailable:
+            pass  # Queue full, stopped or its batch failed: write the vote directly
+        else:
+            if reason:
+                raise _rejected(reason)
+            return VoteResponse.model_validate(vote)
     
     try:
-        db.add(new_vote)
-        
-        # Increment vote count on option
-        option.vote_count += 1
-        
-        db.commit()
-        db.refresh(new_vote)
-        
-        # Broadcast vote update via WebSocket
-        options_data = [
-            {"id": str(opt.id), "text": opt.text, "vote_count": opt.vote_count}
-            for opt in poll.options
-        ]
-        await manager.broadcast_to_poll(
-            str(poll_id),
-            {
-                "type": "vote_update",
-                "poll_id": str(poll_id),
-                "options": options_data
-            }
-        )
-        
+        if db.get_bind().dialect.name == "postgresql":
+            options = (await db.execute(_write_vote_postgresql(vote, now))).all()
+            if not options:
+                raise _rejected(await _rejection(db, poll_id, vote_data.option_id, now))
+            await db.commit()
+        else:
+            options = await _write_vote(db, vote, now)
     except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="You have already voted on this poll")
+        # The poll or option was deleted while the vote was being written
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    # Caches, the vote buffer and websocket clients catch up with the new vote
+    await publish_votes(poll_id, options, [(now, vote_data.option_id)])
     
-    return VoteResponse(
-        id=new_vote.id,
-        poll_id=new_vote.poll_id,
-        option_id=new_vote.option_id,
-        created_at=new_vote.created_at
+    return VoteResponse.model_validate(vote)
+
+async def _write_vote(db: AsyncSession, vote: dict, now: datetime):
+    """Statement-per-step vote write for SQLite and other databases; commits and returns
+    the poll's (id, text, vote_count) rows as of the vote"""
+    poll_id, option_id = vote["poll_id"], vote["option_id"]
+    if not await _insert_vote(db, vote, now):
+        raise _rejected(await _rejection(db, poll_id, option_id, now))
+    
+    await db.execute(
+        update(Option).where(Option.id == option_id).values(vote_count=Option.vote_count + 1)
     )
+    await db.execute(
+        update(Poll).where(Poll.id == poll_id).values(
+            total_votes=Poll.total_votes + 1,
+            version=Poll.version + 1,
+        )
+    )
+    
+    # Keep the per-minute/hour/day rollups in the same transaction
+    await record_vote(db, poll_id, option_id, now)
+    
+    # Counts as of this vote, for the broadcast
+    options = (await db.execute(
+        select(Option.id, Option.text, Option.vote_count).where(Option.poll_id == poll_id)
+    )).all()
+    
+    await db.commit()
+    return options
 
 @router.get("/{poll_id}/user-vote")
 async def get_user_vote(
     poll_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user),
     session_id: Optional[str] = Depends(get_client_session_id)
 ):
@@ -109,15 +219,15 @@ async def get_user_vote(
     vote = None
     
     if current_user:
-        vote = db.query(Vote).filter(
+        vote = await db.scalar(select(Vote).where(
             Vote.poll_id == poll_id,
             Vote.user_id == current_user.id
-        ).first()
+        ).limit(1))
     elif session_id:
-        vote = db.query(Vote).filter(
+        vote = await db.scalar(select(Vote).where(
             Vote.poll_id == poll_id,
             Vote.client_session_id == session_id
-        ).first()
+        ).limit(1))
     
     if not vote:
         return {"has_voted": False, "option_id": None}
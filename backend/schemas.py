@@ -109,6 +109,7 @@ class PollListResponse(BaseModel):
     bookmark_count: int
     option_count: int
     options: Optional[List[OptionResponse]] = None
+    user_has_voted: bool = False
     user_has_bookmarked: bool = False
     tags: List[TagResponse] = []
     
@@ -0,0 +1,101 @@
+"""
+SQL-side timeseries aggregation
+Asks the database for per-sample, per-option vote counts so only points x options
+rows cross the wire. Reads only votes.created_at/option_id through the
+idx_votes_poll_created (poll_id, created_at) index.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, cast, func, select, union_all, Float, Integer, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Vote
+
+# Seconds; absorbs sample datetimes' rounding to whole microseconds and the
+# millisecond precision of julianday() on SQLite
+SAMPLE_TOLERANCE = 1e-3
+
+def _epoch(dialect: str, column):
+    """Epoch seconds of a timestamp column for the given dialect"""
+    if dialect == "postgresql":
+        # Double precision, so the slot arithmetic runs in float8 rather than numeric
+        return cast(func.extract("epoch", column), Float)
+    # SQLite stores UTC timestamps as text; julianday() parses them
+    return (func.julianday(column) - 2440587.5) * 86400.0
+
+def _sample_slot(dialect: str, epoch, first: float, last: float, buckets: int):
+    """Index of the first sample at or after each vote, clamped to [0, buckets].
+
+    A vote exactly at a sample counts toward that sample, like cumulative_counts()'s
+    searchsorted(side="left"). Epochs are not exact on either side, so the offset is
+    shifted back by SAMPLE_TOLERANCE before rounding up.
+    """
+    width = (last - first) / buckets
+    offset = (epoch - first - SAMPLE_TOLERANCE) / width
+    if dialect == "postgresql":
+        return func.least(func.greatest(cast(func.ceil(offset), Integer), 0), buckets)
+    # SQLite has no ceil() without the math extension; CAST truncates, so round up by hand
+    whole = cast(offset, Integer)
+    return case(
+        (offset <= 0, literal(0)),
+        else_=func.min(whole + case((offset > whole, 1), else_=0), buckets),
+    )
+
+def _bucketed_votes(dialect: str, poll_id: UUID, sample_epochs: List[float], end_time: datetime):
+    """(poll_id, slot, option_id, vote_count) rows for one poll's sample grid"""
+    buckets = len(sample_epochs) - 1
+    slots = select(
+        Vote.poll_id,
+        _sample_slot(dialect, _epoch(dialect, Vote.created_at), sample_epochs[0], sample_epochs[-1], buckets).label("slot"),
+        Vote.option_id,
+    ).where(
+        Vote.poll_id == poll_id,
+        Vote.created_at <= end_time,
+    ).subquery()
+
+    # Group on the subquery's columns so PostgreSQL sees one slot expression, not two
+    return select(
+        slots.c.poll_id,
+        slots.c.slot,
+        slots.c.option_id,
+        func.count().label("vote_count"),
+    ).group_by(slots.c.poll_id, slots.c.slot, slots.c.option_id)
+
+async def load_bucketed_events(
+    db: AsyncSession,
+    poll_id: UUID,
+    ts_list: List[datetime],
+    end_time: datetime,
+) -> List[Tuple[float, str, int]]:
+    """Per-sample vote counts as (sample epoch, option id, count) events.
+
+    Everything up to end_time is counted; votes before the first sample are folded
+    into it so cumulative counts start from the right baseline.
+    """
+    events = await load_bucketed_events_for_polls(db, {poll_id: (ts_list, end_time)})
+    return events.get(poll_id, [])
+
+async def load_bucketed_events_for_polls(
+    db: AsyncSession,
+    samples: Dict[UUID, Tuple[List[datetime], datetime]],
+) -> Dict[UUID, List[Tuple[float, str, int]]]:
+    """load_bucketed_events for many polls, each on its own (sample times, end time) grid, in one statement"""
+    if not samples:
+        return {}
+    dialect = db.get_bind().dialect.name
+    sample_epochs = {poll_id: [t.timestamp() for t in ts_list] for poll_id, (ts_list, _) in samples.items()}
+    rows = await db.execute(union_all(*[
+        _bucketed_votes(dialect, poll_id, sample_epochs[poll_id], end_time)
+        for poll_id, (_, end_time) in samples.items()
+    ]))
+
+    events: Dict[UUID, List[Tuple[float, str, int]]] = defaultdict(list)
+    for poll_id, s, option_id, count in rows:
+        events[poll_id].append((sample_epochs[poll_id][int(s)], str(option_id), count))
+    for poll_events in events.values():
+        poll_events.sort()
+    return events
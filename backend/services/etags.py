@@ -0,0 +1,39 @@
+"""
+Conditional GET support
+Handlers derive a weak ETag from a cheap version stamp (Poll.version, or a digest stored
+with a cached page) and answer a matching If-None-Match with 304 before building the
+body. Responses carry Cache-Control: no-cache so clients revalidate on every use;
+payloads holding the caller's voted/bookmarked flags are also private and vary on the
+headers that identify the caller.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+PER_CALLER_VARY = "Authorization, X-Session-Id"
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over parts (anything with a stable repr: str, int, bool, tuples, lists)"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+def etag_headers(etag: str, per_caller: bool = False) -> Dict[str, str]:
+    """Validator and revalidation headers sent with both 200 and 304 responses"""
+    if per_caller:
+        return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": PER_CALLER_VARY}
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+def not_modified(etag: str, per_caller: bool = False, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Bodiless 304 for a client whose copy is still current"""
+    return Response(status_code=304, headers={**etag_headers(etag, per_caller), **(headers or {})})
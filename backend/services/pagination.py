@@ -0,0 +1,60 @@
+"""
+Keyset (cursor) pagination for poll listings
+A cursor is an opaque URL-safe token holding the sort key and id of the last row on a
+page. The next page filters past that key instead of skipping rows, so deep pages cost
+the same as the first and polls created mid-scroll don't shift later pages.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, or_
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def next_cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    """Response headers announcing the next page, for handlers that return a Response"""
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+def encode_cursor(sort: str, key: Any, row_id: UUID) -> str:
+    """Opaque cursor for the row (key, row_id) under the given sort"""
+    if isinstance(key, datetime):
+        payload = {"s": sort, "t": "dt", "k": key.isoformat(), "id": str(row_id)}
+    else:
+        payload = {"s": sort, "t": "n", "k": key, "id": str(row_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, UUID]:
+    """(key, row_id) from a cursor; raises ValueError if it is malformed or from another sort"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != sort:
+            raise ValueError("cursor belongs to a different sort")
+        key = datetime.fromisoformat(payload["k"]) if payload["t"] == "dt" else payload["k"]
+        if not isinstance(key, (datetime, int, float)):
+            raise ValueError("bad cursor key")
+        return key, UUID(payload["id"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+def keyset_order(key_col, id_col, descending: bool = True) -> List[Any]:
+    """ORDER BY clauses for (key, id); id breaks ties so the order is total"""
+    if descending:
+        return [key_col.desc(), id_col.desc()]
+    return [key_col.asc(), id_col.asc()]
+
+def keyset_filter(key_col, id_col, key: Any, row_id: UUID, descending: bool = True):
+    """Rows strictly after (key, row_id) in keyset_order"""
+    if descending:
+        return or_(key_col < key, and_(key_col == key, id_col < row_id))
+    return or_(key_col > key, and_(key_col == key, id_col > row_id))
+
+def split_page(rows: List[Any], limit: int) -> Tuple[List[Any], bool]:
+    """Trim a limit + 1 fetch to the page and report whether more rows follow"""
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,86 @@
+"""
+Poll list pages
+One builder for every endpoint that returns List[PollListResponse]. Counts come from
+the denormalized Poll columns, options and tags are batch-loaded by POLL_LIST_LOADERS,
+and the caller's voted/bookmarked flags take one IN query each, so a page costs the
+same number of statements whatever its size.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models import Poll, Vote, Bookmark, User
+from services.serialization import poll_list_payload
+
+# Query options for pages passed to build_poll_list
+POLL_LIST_LOADERS = (selectinload(Poll.options), selectinload(Poll.tags))
+
+def caller_filters(current_user: Optional[User] = None, session_id: Optional[str] = None):
+    """(Vote, Bookmark) filters selecting the caller's rows: the user if logged in, else the
+    anonymous session; None when the caller is unidentified"""
+    if current_user:
+        return Vote.user_id == current_user.id, Bookmark.user_id == current_user.id
+    if session_id:
+        return Vote.client_session_id == session_id, Bookmark.client_session_id == session_id
+    return None
+
+async def user_poll_flags(
+    db: AsyncSession,
+    poll_ids: Iterable[Any],
+    current_user: Optional[User] = None,
+    session_id: Optional[str] = None,
+) -> Tuple[Set[str], Set[str]]:
+    """(voted, bookmarked) ids, as strings, among poll_ids for the user or else the session"""
+    poll_ids = list(poll_ids)
+    filters = caller_filters(current_user, session_id)
+    if not poll_ids or filters is None:
+        return set(), set()
+    voter, bookmarker = filters
+    voted = await db.scalars(select(Vote.poll_id).where(Vote.poll_id.in_(poll_ids), voter).distinct())
+    bookmarked = await db.scalars(select(Bookmark.poll_id).where(Bookmark.poll_id.in_(poll_ids), bookmarker).distinct())
+    return {str(poll_id) for poll_id in voted}, {str(poll_id) for poll_id in bookmarked}
+
+async def with_user_flags(
+    db: AsyncSession,
+    items: List[Dict[str, Any]],
+    current_user: Optional[User] = None,
+    session_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Copies of page items (e.g. from the shared cache) with the caller's flags filled in"""
+    voted, bookmarked = await user_poll_flags(db, [item["id"] for item in items], current_user, session_id)
+    if not voted and not bookmarked:
+        return items
+    return [
+        {
+            **item,
+            "user_has_voted": str(item["id"]) in voted,
+            "user_has_bookmarked": str(item["id"]) in bookmarked,
+        }
+        for item in items
+    ]
+
+async def build_poll_list(
+    db: AsyncSession,
+    polls: List[Poll],
+    current_user: Optional[User] = None,
+    session_id: Optional[str] = None,
+    include_options: bool = False,
+) -> List[Dict[str, Any]]:
+    """PollListResponse payloads for a page of polls loaded with POLL_LIST_LOADERS.
+
+    Without a user or session the flags stay False and no query is made, which is the
+    shape list_polls caches and shares between callers.
+    """
+    voted, bookmarked = await user_poll_flags(db, [poll.id for poll in polls], current_user, session_id)
+    return [
+        poll_list_payload(
+            poll,
+            include_options=include_options,
+            user_has_voted=str(poll.id) in voted,
+            user_has_bookmarked=str(poll.id) in bookmarked,
+        )
+        for poll in polls
+    ]
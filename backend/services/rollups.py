@@ -0,0 +1,186 @@
+"""
+Per-minute/hour/day vote rollups
+submit_vote increments the buckets in the same transaction as the vote insert, and the
+timeseries endpoint reads buckets instead of raw votes so its cost scales with the range.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import DateTime, and_, func, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Vote, VoteRollup
+
+# (granularity name, bucket width in seconds), finest first
+ROLLUP_GRANULARITIES: List[Tuple[str, int]] = [
+    ("minute", 60),
+    ("hour", 3600),
+    ("day", 86400),
+]
+
+def to_epoch(dt: datetime) -> float:
+    """Epoch seconds for a datetime; naive values (SQLite) are treated as UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def bucket_floor(dt: datetime, width: int) -> datetime:
+    """Start of the bucket of the given width (seconds) containing dt"""
+    epoch = int(to_epoch(dt)) // width * width
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+async def _upsert_rollups(db: AsyncSession, rows: List[dict]) -> None:
+    """Insert rollup rows, adding vote_count onto any bucket that already exists"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Generic read-modify-write fallback for databases without ON CONFLICT
+        for row in rows:
+            existing = await db.get(VoteRollup, (row["poll_id"], row["granularity"], row["bucket_start"], row["option_id"]))
+            if existing:
+                existing.vote_count += row["vote_count"]
+            else:
+                db.add(VoteRollup(**row))
+        await db.flush()
+        return
+
+    stmt = insert(VoteRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["poll_id", "granularity", "bucket_start", "option_id"],
+        set_={"vote_count": VoteRollup.vote_count + stmt.excluded.vote_count},
+    )
+    await db.execute(stmt)
+
+async def record_vote(db: AsyncSession, poll_id: UUID, option_id: UUID, created_at: datetime) -> None:
+    """Count one vote into every rollup level (caller commits)"""
+    await record_votes(db, [(poll_id, option_id, created_at)])
+
+async def record_votes(db: AsyncSession, votes: Iterable[Tuple[UUID, UUID, datetime]]) -> None:
+    """Count (poll_id, option_id, created_at) votes into every rollup level with one upsert.
+
+    Votes sharing a bucket are summed first; an upsert may not touch a row twice. Rows
+    go in primary key order so concurrent upserts lock shared buckets in the same order.
+    """
+    counts: Dict[Tuple[UUID, str, datetime, UUID], int] = defaultdict(int)
+    for poll_id, option_id, created_at in votes:
+        for name, width in ROLLUP_GRANULARITIES:
+            counts[(poll_id, name, bucket_floor(created_at, width), option_id)] += 1
+    if not counts:
+        return
+    await _upsert_rollups(db, [
+        {
+            "poll_id": poll_id,
+            "granularity": name,
+            "bucket_start": bucket_start,
+            "option_id": option_id,
+            "vote_count": count,
+        }
+        for (poll_id, name, bucket_start, option_id), count in sorted(counts.items())
+    ])
+
+def pick_granularity(step_seconds: float) -> Tuple[str, int]:
+    """Coarsest rollup level that still resolves the requested sample step"""
+    chosen = ROLLUP_GRANULARITIES[0]
+    for name, width in ROLLUP_GRANULARITIES:
+        if width <= step_seconds:
+            chosen = (name, width)
+    return chosen
+
+async def load_rollup_events(
+    db: AsyncSession,
+    poll_id: UUID,
+    start_time: datetime,
+    end_time: datetime,
+    step_seconds: float,
+) -> List[Tuple[float, str, int]]:
+    """Return (bucket epoch, option id, count) events covering everything up to end_time.
+
+    Buckets inside the range come from the level picked for step_seconds. Everything
+    before the range is covered by the coarsest buckets that fit (whole days, then
+    hours, then minutes), so the number of rows read depends on the range and the
+    poll's age in days, never on the number of votes. The range ends the same way in
+    reverse: whole buckets of the picked level, then finer ones, then the votes of the
+    last partial minute counted directly, so no vote cast after end_time is included.
+    """
+    name, width = pick_granularity(step_seconds)
+    range_start = bucket_floor(start_time, width)
+    day_start = bucket_floor(range_start, 86400)
+    hour_start = bucket_floor(range_start, 3600)
+
+    tail_start = bucket_floor(end_time, width)
+    branches = [
+        and_(VoteRollup.granularity == "day", VoteRollup.bucket_start < day_start),
+        and_(VoteRollup.granularity == "hour", VoteRollup.bucket_start >= day_start, VoteRollup.bucket_start < hour_start),
+        and_(VoteRollup.granularity == "minute", VoteRollup.bucket_start >= hour_start, VoteRollup.bucket_start < range_start),
+        and_(VoteRollup.granularity == name, VoteRollup.bucket_start >= range_start, VoteRollup.bucket_start < tail_start),
+    ]
+    for finer_name, finer_width in reversed(ROLLUP_GRANULARITIES):
+        if finer_width < width:
+            finer_end = bucket_floor(end_time, finer_width)
+            branches.append(and_(
+                VoteRollup.granularity == finer_name,
+                VoteRollup.bucket_start >= tail_start,
+                VoteRollup.bucket_start < finer_end,
+            ))
+            tail_start = finer_end
+
+    buckets = select(
+        VoteRollup.bucket_start,
+        VoteRollup.option_id,
+        VoteRollup.vote_count,
+    ).where(VoteRollup.poll_id == poll_id, or_(*branches))
+    # Under a minute of votes, bucketed like the rollups at the minute's start
+    tail = select(
+        literal(tail_start, DateTime(timezone=True)),
+        Vote.option_id,
+        func.count(),
+    ).where(
+        Vote.poll_id == poll_id,
+        Vote.created_at >= tail_start,
+        Vote.created_at <= end_time,
+    ).group_by(Vote.option_id)
+    rows = await db.execute(union_all(buckets, tail))
+
+    events = [(to_epoch(bucket_start), str(option_id), count) for bucket_start, option_id, count in rows]
+    events.sort(key=lambda e: e[0])
+    return events
+
+async def load_rollup_events_for_polls(
+    db: AsyncSession,
+    steps: Dict[UUID, float],
+) -> Dict[UUID, List[Tuple[float, str, int]]]:
+    """Whole-lifetime rollup events for many polls in a single query.
+
+    Each poll reads the level picked for its own sample step; polls sharing a level
+    are fetched with one IN clause, so the statement has at most one branch per level.
+    """
+    polls_by_level: Dict[str, List[UUID]] = defaultdict(list)
+    for poll_id, step_seconds in steps.items():
+        polls_by_level[pick_granularity(step_seconds)[0]].append(poll_id)
+    if not polls_by_level:
+        return {}
+
+    rows = await db.execute(select(
+        VoteRollup.poll_id,
+        VoteRollup.bucket_start,
+        VoteRollup.option_id,
+        VoteRollup.vote_count,
+    ).where(
+        or_(*[
+            and_(VoteRollup.granularity == name, VoteRollup.poll_id.in_(poll_ids))
+            for name, poll_ids in polls_by_level.items()
+        ]),
+    ))
+
+    events: Dict[UUID, List[Tuple[float, str, int]]] = defaultdict(list)
+    for poll_id, bucket_start, option_id, count in rows:
+        events[poll_id].append((to_epoch(bucket_start), str(option_id), count))
+    for poll_events in events.values():
+        poll_events.sort(key=lambda e: e[0])
+    return events
@@ -0,0 +1,109 @@
+"""
+Full-text poll search
+PostgreSQL matches against the same to_tsvector() expression as the GIN index created by
+add_indexes.py, so searches use the index. The SQLite fallback uses an FTS5 table kept in
+sync by triggers. Every search word is prefix-matched ("pyth" finds "python"), all words
+must match, and a relevance rank is exposed for sort=relevance. Other databases, SQLite
+builds without FTS5, and PostgreSQL searches made only of stop words ("the") fall back
+to ILIKE.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, Select, func, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Poll
+
+# Must stay identical to idx_polls_title_description_search in add_indexes.py; constants
+# are inlined rather than bound so the planner can match the index expression
+POLL_SEARCH_VECTOR = func.to_tsvector(
+    literal_column("'english'"),
+    Poll.title.op("||")(literal_column("' '")).op("||")(func.coalesce(Poll.description, literal_column("''"))),
+)
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS polls_fts USING fts5(
+        title, description, content='polls', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS polls_fts_ai AFTER INSERT ON polls BEGIN
+        INSERT INTO polls_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS polls_fts_ad AFTER DELETE ON polls BEGIN
+        INSERT INTO polls_fts(polls_fts, rowid, title, description) VALUES ('delete', old.rowid, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS polls_fts_au AFTER UPDATE OF title, description ON polls BEGIN
+        INSERT INTO polls_fts(polls_fts, rowid, title, description) VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO polls_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END
+    """,
+]
+
+_sqlite_fts_ready: Optional[bool] = None
+
+def create_sqlite_fts(conn) -> bool:
+    """Create (or rebuild) the SQLite FTS5 index; returns False if FTS5 is unavailable.
+
+    The index is keyed on the implicit rowid, which VACUUM may renumber, so it is
+    rebuilt from the polls table on every call.
+    """
+    global _sqlite_fts_ready
+    try:
+        for ddl in SQLITE_FTS_DDL:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO polls_fts(polls_fts) VALUES ('rebuild')"))
+        conn.commit()
+        _sqlite_fts_ready = True
+    except Exception as e:
+        print(f"⚠ SQLite FTS5 unavailable, search falls back to LIKE: {e}")
+        conn.rollback()
+        _sqlite_fts_ready = False
+    return _sqlite_fts_ready
+
+async def _sqlite_fts_available(db: AsyncSession) -> bool:
+    global _sqlite_fts_ready
+    if _sqlite_fts_ready is None:
+        result = await db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'polls_fts'"))
+        _sqlite_fts_ready = result.first() is not None
+    return _sqlite_fts_ready
+
+def search_terms(search: str) -> List[str]:
+    """Lower-cased word tokens; punctuation never reaches the query syntax"""
+    return re.findall(r"\w+", search.lower())
+
+async def apply_search(db: AsyncSession, query: Select, search: str) -> Tuple[Select, Optional[object]]:
+    """Filter a select of polls to those matching search; returns (query, relevance column or None).
+
+    Higher relevance is better on every backend. None means no ranked search was possible.
+    """
+    terms = search_terms(search)
+    dialect = db.get_bind().dialect.name
+    if terms and dialect == "postgresql":
+        ts_query = func.to_tsquery(literal_column("'english'"), " & ".join(f"{term}:*" for term in terms))
+        # to_tsquery drops stop words; with nothing left the query would match no poll
+        if await db.scalar(select(func.numnode(ts_query))):
+            query = query.where(POLL_SEARCH_VECTOR.op("@@")(ts_query))
+            return query, func.ts_rank(POLL_SEARCH_VECTOR, ts_query)
+    if terms and dialect == "sqlite" and await _sqlite_fts_available(db):
+        matches = text(
+            "SELECT rowid AS poll_rowid, -bm25(polls_fts) AS relevance FROM polls_fts WHERE polls_fts MATCH :match"
+        ).bindparams(
+            match=" ".join(f'"{term}"*' for term in terms)
+        ).columns(poll_rowid=Integer, relevance=Float).subquery("fts_matches")
+        query = query.join(matches, literal_column("polls.rowid") == matches.c.poll_rowid)
+        return query, matches.c.relevance
+
+    search_term = f"%{search}%"
+    query = query.where(
+        (Poll.title.ilike(search_term)) |
+        (Poll.description.ilike(search_term))
+    )
+    return query, None
@@ -0,0 +1,107 @@
+"""
+Fast JSON serialization for poll responses
+Returning pydantic models makes FastAPI validate every item again against response_model
+and then encode it with stdlib json. The builders here turn ORM rows straight into plain
+dicts shaped like the schemas, and FastJSONResponse encodes them once, with orjson when
+it is installed. Returning a Response skips response_model validation; the route's
+response_model still documents the schema in OpenAPI.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+# Optional fast codec; stdlib json is used when orjson is not installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        # Same format as pydantic and orjson's OPT_UTC_Z
+        if value.utcoffset() == timedelta(0):
+            return value.replace(tzinfo=None).isoformat() + "Z"
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes; UUID and datetime are encoded natively, as pydantic would"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(raw) -> Any:
+    """Inverse of dumps (accepts bytes or str)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps; content must already match the response schema"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def tag_payload(tag) -> Dict[str, Any]:
+    """TagResponse as a dict"""
+    return {
+        "id": tag.id,
+        "name": tag.name,
+        "slug": tag.slug,
+        "description": tag.description,
+        "created_at": tag.created_at,
+    }
+
+def option_payload(option) -> Dict[str, Any]:
+    """OptionResponse as a dict"""
+    return {"id": option.id, "text": option.text, "vote_count": option.vote_count}
+
+def poll_list_payload(
+    poll,
+    include_options: bool = False,
+    user_has_voted: bool = False,
+    user_has_bookmarked: bool = False,
+) -> Dict[str, Any]:
+    """PollListResponse as a dict; options are only listed when include_options is set"""
+    options = poll.options
+    return {
+        "id": poll.id,
+        "title": poll.title,
+        "description": poll.description,
+        "creator_id": poll.creator_id,
+        "created_at": poll.created_at,
+        "expires_at": poll.expires_at,
+        "total_votes": poll.total_votes,
+        "bookmark_count": poll.bookmark_count,
+        "option_count": len(options),
+        "options": [option_payload(option) for option in options] if include_options else None,
+        "user_has_voted": user_has_voted,
+        "user_has_bookmarked": user_has_bookmarked,
+        "tags": [tag_payload(tag) for tag in poll.tags],
+    }
+
+def poll_payload(poll, user_has_voted: bool = False, user_has_bookmarked: bool = False) -> Dict[str, Any]:
+    """PollResponse as a dict"""
+    return {
+        "id": poll.id,
+        "title": poll.title,
+        "description": poll.description,
+        "creator_id": poll.creator_id,
+        "expires_at": poll.expires_at,
+        "created_at": poll.created_at,
+        "options": [option_payload(option) for option in poll.options],
+        "bookmark_count": poll.bookmark_count,
+        "total_votes": poll.total_votes,
+        "user_has_voted": user_has_voted,
+        "user_has_bookmarked": user_has_bookmarked,
+        "tags": [tag_payload(tag) for tag in poll.tags],
+    }
@@ -0,0 +1,242 @@
+"""
+Vectorized timeseries engine
+Turns time-ordered vote events (raw votes or rollup buckets) into the sampled
+count/percent series served by the timeseries endpoints, using NumPy arrays
+instead of per-vote Python loops.
+"""
+
+import json
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (epoch seconds, option id, vote count) as produced by services.rollups
+Event = Tuple[float, str, int]
+
+def events_to_arrays(events: Sequence[Event], option_ids: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split (epoch, option id, count) events into epoch, option index and weight arrays.
+    Events for options not in option_ids are dropped."""
+    index_of = {opt_id: i for i, opt_id in enumerate(option_ids)}
+    n = len(events)
+    epochs = np.fromiter((e[0] for e in events), dtype=np.float64, count=n)
+    option_idx = np.fromiter((index_of.get(e[1], -1) for e in events), dtype=np.int64, count=n)
+    weights = np.fromiter((e[2] for e in events), dtype=np.int64, count=n)
+    known = option_idx >= 0
+    if not known.all():
+        return epochs[known], option_idx[known], weights[known]
+    return epochs, option_idx, weights
+
+def cumulative_counts(
+    epochs: np.ndarray,
+    option_idx: np.ndarray,
+    weights: Optional[np.ndarray],
+    sample_epochs: np.ndarray,
+    n_options: int,
+) -> np.ndarray:
+    """Cumulative votes per option at each sample time, shape (points, n_options).
+
+    An event is counted from the first sample at or after its timestamp; events
+    after the last sample are ignored. Events need not be sorted.
+    """
+    points = len(sample_epochs)
+    if n_options == 0:
+        return np.zeros((points, 0), dtype=np.int64)
+    # Sample slot per event; slot == points means "after the range"
+    slots = np.searchsorted(sample_epochs, epochs, side="left")
+    flat = np.bincount(slots * n_options + option_idx, weights=weights, minlength=(points + 1) * n_options)
+    per_slot = flat[:points * n_options].reshape(points, n_options).astype(np.int64)
+    return np.cumsum(per_slot, axis=0)
+
+def to_percent(counts: np.ndarray) -> np.ndarray:
+    """Share of the running total per option, 0 where no votes have been cast yet"""
+    totals = counts.sum(axis=1, keepdims=True)
+    values = counts.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percents = np.where(totals > 0, values / totals * 100.0, 0.0)
+    return percents
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Centered moving average along axis 0, shrinking the window at the edges"""
+    points = values.shape[0]
+    if window <= 1 or points == 0:
+        return values
+    half = window // 2
+    totals = np.zeros_like(values)
+    sizes = np.zeros(points)
+    # Accumulate neighbours left to right so sums match a plain Python sum()
+    for offset in range(-half, half + 1):
+        lo, hi = max(0, -offset), min(points, points - offset)
+        if lo >= hi:
+            continue
+        totals[lo:hi] += values[lo + offset:hi + offset]
+        sizes[lo:hi] += 1
+    return totals / sizes[:, None]
+
+def ema(values: np.ndarray, window: int) -> np.ndarray:
+    """Exponential moving average along axis 0, seeded with the first sample"""
+    if window <= 1 or values.shape[0] == 0:
+        return values
+    alpha = 2 / (window + 1)
+    result = np.empty_like(values)
+    prev = values[0]
+    # The recurrence is sequential in time but runs across all options at once
+    for i in range(values.shape[0]):
+        prev = alpha * values[i] + (1 - alpha) * prev
+        result[i] = prev
+    return result
+
+def lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over an evenly spaced grid.
+
+    values has shape (points, series). One index set is chosen for all series by
+    summing each candidate's triangle area across them, so every option keeps a
+    shared x axis. First and last samples are always kept.
+    """
+    points = values.shape[0]
+    if n_out >= points or n_out < 3:
+        return np.arange(points)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, points - 1
+    # Bucket edges over the interior samples 1..points-2
+    edges = np.linspace(1, points - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            cx = (next_lo + next_hi - 1) / 2.0
+            cy = values[next_lo:next_hi].mean(axis=0)
+        else:
+            cx, cy = float(points - 1), values[points - 1]
+        bx = np.arange(lo, hi, dtype=np.float64)
+        by = values[lo:hi]
+        ay = values[a]
+        areas = np.abs((a - cx) * (by - ay) - (a - bx)[:, None] * (cy - ay)).sum(axis=1)
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def compute_values(
+    n_options: int,
+    epochs: np.ndarray,
+    option_idx: np.ndarray,
+    weights: Optional[np.ndarray],
+    ts_list: List[datetime],
+    metric: str,
+) -> np.ndarray:
+    """Metric values per sample and option, shape (points, n_options)"""
+    sample_epochs = np.asarray([t.timestamp() for t in ts_list], dtype=np.float64)
+    counts = cumulative_counts(epochs, option_idx, weights, sample_epochs, n_options)
+
+    if metric == "percent":
+        return to_percent(counts)
+    return counts.astype(np.float64)
+
+def format_series(
+    option_ids: List[str],
+    id_to_label: Dict[str, str],
+    values: np.ndarray,
+    ts_list: List[datetime],
+) -> Dict[str, Any]:
+    """Default response shape:
+      { "series": [{ id, label, data: [{x,y}] }], "meta": { optionIdToLabel } }
+    """
+    xs = [t.isoformat() for t in ts_list]
+    series_data: List[Dict[str, Any]] = []
+    for j, opt_id in enumerate(option_ids):
+        label = id_to_label.get(opt_id, opt_id)
+        series_data.append({
+            "id": label,
+            "label": label,
+            "data": [{"x": x, "y": round(y, 4)} for x, y in zip(xs, values[:, j].tolist())],
+        })
+
+    return {
+        "series": series_data,
+        "meta": {
+            "optionIdToLabel": id_to_label,
+        }
+    }
+
+def format_columnar(
+    option_ids: List[str],
+    id_to_label: Dict[str, str],
+    values: np.ndarray,
+    ts_list: List[datetime],
+) -> Dict[str, Any]:
+    """Compact shape with one shared x column of epoch seconds:
+      { "x": [epoch...], "series": [{ id, label, y: [...] }], "meta": { optionIdToLabel } }
+    """
+    return {
+        "x": [round(t.timestamp(), 3) for t in ts_list],
+        "series": [
+            {
+                "id": id_to_label.get(opt_id, opt_id),
+                "label": id_to_label.get(opt_id, opt_id),
+                "y": [round(y, 4) for y in values[:, j].tolist()],
+            }
+            for j, opt_id in enumerate(option_ids)
+        ],
+        "meta": {
+            "optionIdToLabel": id_to_label,
+        }
+    }
+
+BINARY_MAGIC = b"QPTS"
+BINARY_VERSION = 1
+
+def pack_binary(
+    option_ids: List[str],
+    id_to_label: Dict[str, str],
+    values: np.ndarray,
+    ts_list: List[datetime],
+) -> bytes:
+    """Packed little-endian layout:
+      "QPTS" | u8 version | u32 header length | UTF-8 JSON header { ids, labels } |
+      u32 points | u32 options | f64[points] x epochs | f32[options][points] y values
+    """
+    header = json.dumps({
+        "ids": option_ids,
+        "labels": [id_to_label.get(opt_id, opt_id) for opt_id in option_ids],
+    }).encode("utf-8")
+    points, n_options = len(ts_list), len(option_ids)
+    xs = np.asarray([t.timestamp() for t in ts_list], dtype="<f8")
+    ys = np.ascontiguousarray(values.T, dtype="<f4")
+    return b"".join([
+        BINARY_MAGIC,
+        struct.pack("<BI", BINARY_VERSION, len(header)),
+        header,
+        struct.pack("<II", points, n_options),
+        xs.tobytes(),
+        ys.tobytes(),
+    ])
+
+def build_timeseries(
+    option_ids: List[str],
+    id_to_label: Dict[str, str],
+    epochs: np.ndarray,
+    option_idx: np.ndarray,
+    weights: Optional[np.ndarray],
+    ts_list: List[datetime],
+    metric: str,
+    smooth: Optional[str] = None,
+    window: int = 3,
+    fmt: str = "series",
+    downsample_to: Optional[int] = None,
+):
+    """Build the timeseries response from event arrays (weights=None means one vote each).
+    downsample_to reduces a dense ts_list to that many points with LTTB before smoothing.
+    fmt selects format_series (default), format_columnar or pack_binary."""
+    values = compute_values(len(option_ids), epochs, option_idx, weights, ts_list, metric)
+    if downsample_to is not None and downsample_to < len(ts_list):
+        keep = lttb_indices(values, downsample_to)
+        values = values[keep]
+        ts_list = [ts_list[i] for i in keep.tolist()]
+    if smooth == "ma":
+        values = moving_average(values, window)
+    elif smooth == "ema":
+        values = ema(values, window)
+    formatter = {"series": format_series, "columnar": format_columnar, "binary": pack_binary}[fmt]
+    return formatter(option_ids, id_to_label, values, ts_list)
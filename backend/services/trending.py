@@ -0,0 +1,119 @@
+"""
+Materialized trending scores
+A poll's trending score is the sum of its votes, each decayed exponentially with age.
+It is stored in log space relative to a fixed origin,
+    trending_score = ln(sum(exp((t_vote - TRENDING_ORIGIN) / tau))),
+so decay never rewrites stored scores (every poll decays by the same factor) and the
+ordering is always current. A background task folds newly closed minute rollups into
+the scores, and the trending sort is an indexed scan on polls.trending_score.
+"""
+
+import asyncio
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Poll, TrendingState, VoteRollup
+from models.database import SessionLocal
+from services.rollups import bucket_floor, to_epoch
+
+TRENDING_HALF_LIFE = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 24)) * 3600
+TRENDING_REFRESH_INTERVAL = float(os.getenv("TRENDING_REFRESH_SECONDS", 30))
+# Minutes this recent are left for the next run so in-flight vote transactions land first
+TRENDING_LAG = 60
+# Every vote after the origin adds a positive term, so 0 can mean "no votes yet"
+TRENDING_ORIGIN = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+_TAU = TRENDING_HALF_LIFE / math.log(2)
+_UPDATE_CHUNK = 1000
+
+def log_weight(epoch: float, count: int = 1) -> float:
+    """Log-space contribution of count votes cast at epoch"""
+    return math.log(count) + (epoch - TRENDING_ORIGIN.timestamp()) / _TAU
+
+def combine_scores(terms: Iterable[float]) -> float:
+    """ln(sum(exp(term))) computed without overflow; 0 terms (no votes) are skipped"""
+    terms = [t for t in terms if t != 0.0]
+    if not terms:
+        return 0.0
+    peak = max(terms)
+    return peak + math.log(sum(math.exp(t - peak) for t in terms))
+
+def refresh_trending_scores(db: Session, now: Optional[datetime] = None) -> int:
+    """Fold minute rollups closed since the last run into Poll.trending_score.
+
+    The first run (no watermark yet) folds in every minute bucket. Returns the number
+    of polls updated. The state row is locked, so concurrent workers apply each minute
+    exactly once.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = bucket_floor(now, 60) - timedelta(seconds=TRENDING_LAG)
+
+    state = db.query(TrendingState).filter(TrendingState.id == 1).with_for_update().first()
+    if state is None:
+        state = TrendingState(id=1, processed_until=None)
+        db.add(state)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another worker created it first; it will do this run
+            db.rollback()
+            return 0
+    since = state.processed_until
+    if since is not None and to_epoch(since) >= to_epoch(cutoff):
+        db.rollback()
+        return 0
+
+    query = db.query(
+        VoteRollup.poll_id,
+        VoteRollup.bucket_start,
+        func.sum(VoteRollup.vote_count),
+    ).filter(
+        VoteRollup.granularity == "minute",
+        VoteRollup.bucket_start < cutoff,
+    )
+    if since is not None:
+        query = query.filter(VoteRollup.bucket_start >= since)
+    terms: Dict[UUID, List[float]] = defaultdict(list)
+    for poll_id, bucket_start, count in query.group_by(VoteRollup.poll_id, VoteRollup.bucket_start):
+        if count:
+            terms[poll_id].append(log_weight(to_epoch(bucket_start), count))
+
+    poll_ids = list(terms)
+    for i in range(0, len(poll_ids), _UPDATE_CHUNK):
+        chunk = poll_ids[i:i + _UPDATE_CHUNK]
+        current = dict(db.query(Poll.id, Poll.trending_score).filter(Poll.id.in_(chunk)).all())
+        rows = [
+            {"id": poll_id, "trending_score": combine_scores([current[poll_id], *terms[poll_id]])}
+            for poll_id in chunk
+            if poll_id in current  # Deleted since the bucket was written
+        ]
+        if rows:
+            db.execute(update(Poll), rows)
+
+    state.processed_until = cutoff
+    db.commit()
+    return len(poll_ids)
+
+def _refresh_once():
+    db = SessionLocal()
+    try:
+        refresh_trending_scores(db)
+    finally:
+        db.close()
+
+async def run_trending_refresher():
+    """Refresh trending scores every TRENDING_REFRESH_INTERVAL seconds until cancelled"""
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_once)
+        except Exception as e:
+            print(f"Trending score refresh failed: {e}")
+        await asyncio.sleep(TRENDING_REFRESH_INTERVAL)
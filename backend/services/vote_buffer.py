@@ -0,0 +1,235 @@
+"""
+In-memory per-poll vote event buffers
+Each worker keeps (epoch, option index) pairs for live polls in compact arrays so
+timeseries requests can be answered without reading votes from the database.
+A buffer is warmed with one column-only query and then kept current by submit_vote;
+reads compare its length with the poll's total_votes and, when it is short (votes
+taken by other workers), top it up with the votes cast after its newest event.
+Total memory is capped; the least recently used polls are evicted first.
+"""
+
+import os
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Vote
+from services.rollups import to_epoch
+
+class PollEventBuffer:
+    """Append-only vote events for one poll"""
+
+    def __init__(self, option_ids: List[str]):
+        self.option_ids = option_ids
+        self.index_of = {opt_id: i for i, opt_id in enumerate(option_ids)}
+        self.epochs = array("d")
+        self.options = array("H")  # Option index; polls are capped well below 65k options
+        self.warmed_at = time.monotonic()
+        self.last_epoch = 0.0  # Newest event; top-ups load the votes after it
+
+    def append(self, epoch: float, option_id: str) -> bool:
+        idx = self.index_of.get(option_id)
+        if idx is None:
+            return False
+        self.epochs.append(epoch)
+        self.options.append(idx)
+        if epoch > self.last_epoch:
+            self.last_epoch = epoch
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.epochs) * self.epochs.itemsize + len(self.options) * self.options.itemsize
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def arrays(self, option_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Epoch and option index arrays, with indexes relative to option_ids"""
+        # Copies, so the arrays stay appendable while the result is in use
+        epochs = np.array(self.epochs, dtype=np.float64)
+        option_idx = np.array(self.options, dtype=np.int64)
+        if option_ids != self.option_ids:
+            remap = np.asarray([option_ids.index(o) if o in option_ids else -1 for o in self.option_ids], dtype=np.int64)
+            option_idx = remap[option_idx]
+            known = option_idx >= 0
+            epochs, option_idx = epochs[known], option_idx[known]
+        return epochs, option_idx
+
+class _LoadTicket:
+    """One in-flight load; collects the votes published for its poll while it runs"""
+    __slots__ = ("published", "evicted")
+
+    def __init__(self):
+        self.published: List[Tuple[float, str]] = []
+        self.evicted = False
+
+class VoteEventBuffers:
+    """LRU collection of PollEventBuffer bounded by total bytes"""
+
+    def __init__(self, max_bytes: int, max_events_per_poll: int, max_age: float):
+        self.max_bytes = max_bytes
+        self.max_events_per_poll = max_events_per_poll
+        self.max_age = max_age  # Full re-warm after this long, catching anything a top-up missed
+        self._buffers: "OrderedDict[str, PollEventBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, _LoadTicket] = {}
+        self.total_bytes = 0
+        self.warms = 0
+        self.top_ups = 0
+        self.evictions = 0
+
+    async def get(self, db: AsyncSession, poll_id: UUID, option_ids: List[str], expected_votes: int) -> Optional[PollEventBuffer]:
+        """Buffer for a poll, warming or topping it up from the database if needed.
+
+        expected_votes is the poll's committed total_votes. A buffer holding fewer events
+        lags other workers and is topped up with the votes cast after its newest event;
+        if it is still short (or holds more), it is re-warmed from scratch. Returns None
+        for polls too large to buffer, while another request is loading the poll, or if
+        the poll was evicted during the load; callers fall back to rollups.
+        """
+        key = str(poll_id)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is not None and (time.monotonic() - buffer.warmed_at >= self.max_age or len(buffer) > expected_votes):
+                self._discard(key)
+                buffer = None
+            if buffer is not None and len(buffer) == expected_votes:
+                self._buffers.move_to_end(key)
+                return buffer
+            if expected_votes > self.max_events_per_poll or key in self._loading:
+                return None
+            # Votes published while a load runs may or may not be in its snapshot
+            ticket = _LoadTicket()
+            self._loading[key] = ticket
+
+        try:
+            if buffer is not None:
+                since = datetime.fromtimestamp(buffer.last_epoch, tz=timezone.utc)
+                rows = await self._load(db, poll_id, Vote.created_at > since)
+                with self._lock:
+                    if ticket.evicted or self._buffers.get(key) is not buffer:
+                        return None
+                    before = buffer.nbytes
+                    # Published votes were appended live; add only the rest of the snapshot
+                    for epoch, option_id in self._unpublished(rows, ticket):
+                        buffer.append(epoch, option_id)
+                    self.total_bytes += buffer.nbytes - before
+                    self.top_ups += 1
+                    if len(buffer) > self.max_events_per_poll:
+                        self._discard(key)
+                        return None
+                    if len(buffer) >= expected_votes:
+                        self._buffers.move_to_end(key)
+                        self._evict_over_budget(keep=key)
+                        return buffer
+                    # Still short: a vote committed out of created_at order was skipped
+                    self._discard(key)
+
+            rows = await self._load(db, poll_id)
+            with self._lock:
+                if ticket.evicted:
+                    return None
+                buffer = PollEventBuffer(option_ids)
+                # The snapshot plus the votes published during the load that it missed
+                for epoch, option_id in ticket.published + self._unpublished(rows, ticket):
+                    buffer.append(epoch, option_id)
+                self._discard(key)
+                self._buffers[key] = buffer
+                self.total_bytes += buffer.nbytes
+                self.warms += 1
+                self._evict_over_budget(keep=key)
+            return buffer
+        finally:
+            with self._lock:
+                if self._loading.get(key) is ticket:
+                    del self._loading[key]
+
+    @staticmethod
+    async def _load(db: AsyncSession, poll_id: UUID, *criteria) -> List[Tuple[float, str]]:
+        # Single column-only load; no ORM entities are built
+        rows = await db.execute(select(Vote.created_at, Vote.option_id).where(Vote.poll_id == poll_id, *criteria))
+        return [(to_epoch(created_at), str(option_id)) for created_at, option_id in rows]
+
+    @staticmethod
+    def _unpublished(rows: List[Tuple[float, str]], ticket: "_LoadTicket") -> List[Tuple[float, str]]:
+        # Rows not matched one-for-one by a vote the ticket saw published
+        pending = Counter(ticket.published)
+        unmatched = []
+        for event in rows:
+            if pending[event]:
+                pending[event] -= 1
+            else:
+                unmatched.append(event)
+        return unmatched
+
+    def append(self, poll_id: UUID, created_at: datetime, option_id: UUID):
+        """Record a committed vote; polls without a warm buffer are skipped"""
+        key = str(poll_id)
+        epoch = to_epoch(created_at)
+        with self._lock:
+            ticket = self._loading.get(key)
+            if ticket is not None:
+                ticket.published.append((epoch, str(option_id)))
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                return
+            before = buffer.nbytes
+            if not buffer.append(epoch, str(option_id)):
+                # Option set changed under us; rebuild on next read
+                self._discard(key)
+                return
+            self.total_bytes += buffer.nbytes - before
+            if len(buffer) > self.max_events_per_poll:
+                self._discard(key)
+            self._evict_over_budget(keep=key)
+
+    def evict(self, poll_id: UUID):
+        with self._lock:
+            ticket = self._loading.get(str(poll_id))
+            if ticket is not None:
+                ticket.evicted = True
+            self._discard(str(poll_id))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "polls": len(self._buffers),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "warms": self.warms,
+                "top_ups": self.top_ups,
+                "evictions": self.evictions,
+                "per_poll_bytes": {key: buffer.nbytes for key, buffer in self._buffers.items()},
+            }
+
+    def _discard(self, key: str):
+        # Caller holds the lock
+        buffer = self._buffers.pop(key, None)
+        if buffer is not None:
+            self.total_bytes -= buffer.nbytes
+
+    def _evict_over_budget(self, keep: str):
+        # Caller holds the lock; drop coldest polls first, never the one just used
+        for key in list(self._buffers):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._discard(key)
+            self.evictions += 1
+
+# Global buffer instance (per worker)
+vote_buffers = VoteEventBuffers(
+    max_bytes=int(os.getenv("VOTE_BUFFER_MAX_BYTES", 64 * 1024 * 1024)),
+    max_events_per_poll=int(os.getenv("VOTE_BUFFER_MAX_EVENTS", 500_000)),
+    max_age=float(os.getenv("VOTE_BUFFER_MAX_AGE", 300)),
+)
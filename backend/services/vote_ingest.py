@@ -0,0 +1,306 @@
+"""
+Group-committed vote ingestion
+With VOTE_GROUP_COMMIT enabled, submit_vote queues each vote and awaits a background
+writer that commits votes in batches: one validation read, one multi-row insert that
+skips unique_user_vote/unique_session_vote conflicts, one increment per touched option
+and poll, and one rollup upsert, all in a single transaction. The caller's request is
+answered only after the commit holding its vote, so an acknowledged vote is durable.
+A batch is written once VOTE_BATCH_SIZE votes are waiting or the oldest has waited
+VOTE_BATCH_MAX_WAIT_MS. When the queue is full or a batch fails, submit_vote writes
+the vote on its own instead.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, insert as sa_insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Option, Poll, Vote
+from models.database import AsyncSessionLocal
+from cache import timeseries_cache
+from services.rollups import record_votes
+from services.vote_buffer import vote_buffers
+from websocket.manager import manager
+
+class VoteIngestUnavailable(Exception):
+    """The vote was not committed by the queue; write it directly"""
+
+async def publish_votes(poll_id: UUID, options: Sequence[Tuple[UUID, str, int]], voted: Sequence[Tuple[datetime, UUID]]):
+    """After commit: drop cached series, extend the vote buffer and tell websocket clients.
+
+    options are the poll's (id, text, vote_count) rows as of the commit; voted are the
+    committed (created_at, option_id) pairs, oldest first.
+    """
+    timeseries_cache.invalidate_tag(str(poll_id))
+    for created_at, option_id in voted:
+        vote_buffers.append(poll_id, created_at, option_id)
+
+    options_data = [
+        {"id": str(opt_id), "text": text, "vote_count": vote_count}
+        for opt_id, text, vote_count in options
+    ]
+    await manager.broadcast_to_poll(
+        str(poll_id),
+        {
+            "type": "vote_update",
+            "poll_id": str(poll_id),
+            "options": options_data
+        }
+    )
+    # Timeseries subscribers get only the sample points these votes changed
+    await manager.push_timeseries(str(poll_id), options_data, voted[-1][0])
+
+def _voter_key(vote: dict) -> tuple:
+    # Mirrors unique_user_vote / unique_session_vote
+    if vote["user_id"] is not None:
+        return (vote["poll_id"], "user", vote["user_id"])
+    return (vote["poll_id"], "session", vote["client_session_id"])
+
+async def _insert_votes(db: AsyncSession, rows: List[dict]) -> set:
+    """Multi-row insert skipping rows that conflict with an existing vote; ids written"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Databases without ON CONFLICT: one savepoint per row
+        written = set()
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    await db.execute(sa_insert(Vote).values(row))
+            except IntegrityError:
+                continue
+            written.add(row["id"])
+        return written
+
+    stmt = insert(Vote).values(rows).on_conflict_do_nothing().returning(Vote.id)
+    return set((await db.scalars(stmt)).all())
+
+class VoteIngestQueue:
+    """Bounded queue of votes drained by one group-committing writer task"""
+
+    def __init__(self, enabled: bool, batch_size: int, max_wait: float, max_queue: int):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.max_wait = max_wait  # Seconds the oldest queued vote may wait for its batch
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.batches = 0
+        self.votes_committed = 0
+        self.votes_rejected = 0
+        self.batch_failures = 0
+        self.overflows = 0
+        self.peak_depth = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the writer on the running loop (no-op unless enabled)"""
+        if self.enabled and not self.running:
+            self._closing = False
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Refuse new votes, let the writer commit everything queued, then stop it"""
+        if not self.running:
+            return
+        self._closing = True
+        # Sentinel behind the last queued vote; waits for room if the queue is full
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, vote: dict) -> Optional[str]:
+        """Queue a vote and wait for its batch to commit.
+
+        vote holds the Vote columns (id, poll_id, option_id, user_id, client_session_id,
+        created_at). Returns None once the vote is committed, or why it was refused:
+        'poll_not_found', 'expired', 'option_not_found' or 'duplicate'. Raises
+        VoteIngestUnavailable if the vote was not committed and should be written directly.
+        """
+        if not self.running or self._closing:
+            raise VoteIngestUnavailable()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((vote, future))
+        except asyncio.QueueFull:
+            self.overflows += 1
+            raise VoteIngestUnavailable()
+        self.peak_depth = max(self.peak_depth, self._queue.qsize())
+        # Shielded: a client that disconnects must not cancel the writer's bookkeeping
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "peak_queue_depth": self.peak_depth,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "votes_committed": self.votes_committed,
+            "votes_rejected": self.votes_rejected,
+            "batch_failures": self.batch_failures,
+            "overflows": self.overflows,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+        }
+
+    def _drain(self, batch: list) -> bool:
+        """Move queued votes into batch up to batch_size; True if the stop sentinel was reached"""
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            stopping = self._drain(batch)
+            if not stopping and len(batch) < self.batch_size:
+                # Give the batch until the oldest vote's deadline to fill up
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+                stopping = self._drain(batch)
+            await self._write(batch)
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Commit one batch and settle its futures; never raises"""
+        started = time.perf_counter()
+        try:
+            outcomes, options_by_poll = await self._commit(batch)
+        except Exception as e:
+            # Nothing was committed; every caller falls back to a direct write
+            self.batch_failures += 1
+            print(f"Vote batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(VoteIngestUnavailable())
+            return
+
+        voted_by_poll: Dict[UUID, List[Tuple[datetime, UUID]]] = defaultdict(list)
+        for (vote, future), outcome in zip(batch, outcomes):
+            if outcome is None:
+                voted_by_poll[vote["poll_id"]].append((vote["created_at"], vote["option_id"]))
+            else:
+                self.votes_rejected += 1
+            if not future.done():
+                future.set_result(outcome)
+        self.batches += 1
+        self.votes_committed += sum(len(voted) for voted in voted_by_poll.values())
+        self.last_batch_size = len(batch)
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+        # One broadcast per poll per batch, whatever the number of votes in it
+        for poll_id, voted in voted_by_poll.items():
+            try:
+                await publish_votes(poll_id, options_by_poll[poll_id], sorted(voted))
+            except Exception as e:
+                print(f"Vote broadcast for poll {poll_id} failed: {e}")
+
+    async def _commit(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """(outcome per vote, committed options per touched poll) for one transaction"""
+        votes = [vote for vote, _ in batch]
+        poll_ids = {vote["poll_id"] for vote in votes}
+        async with AsyncSessionLocal() as db:
+            # Validate every vote against one read of the polls' options
+            rows = (await db.execute(
+                select(Option.id, Option.poll_id, Poll.expires_at).join(Poll, Poll.id == Option.poll_id).where(
+                    Option.poll_id.in_(poll_ids)
+                )
+            )).all()
+            expires = {poll_id: expires_at for _, poll_id, expires_at in rows}
+            option_poll = {option_id: poll_id for option_id, poll_id, _ in rows}
+
+            outcomes: List[Optional[str]] = []
+            seen = set()
+            for vote in votes:
+                poll_id = vote["poll_id"]
+                if poll_id not in expires:
+                    outcomes.append("poll_not_found")
+                elif expires[poll_id] and expires[poll_id] < vote["created_at"]:
+                    outcomes.append("expired")
+                elif option_poll.get(vote["option_id"]) != poll_id:
+                    outcomes.append("option_not_found")
+                elif _voter_key(vote) in seen:
+                    outcomes.append("duplicate")
+                else:
+                    seen.add(_voter_key(vote))
+                    outcomes.append(None)
+
+            candidates = [vote for vote, outcome in zip(votes, outcomes) if outcome is None]
+            written = await _insert_votes(db, candidates) if candidates else set()
+            outcomes = [
+                "duplicate" if outcome is None and vote["id"] not in written else outcome
+                for vote, outcome in zip(votes, outcomes)
+            ]
+            accepted = [vote for vote, outcome in zip(votes, outcomes) if outcome is None]
+            if not accepted:
+                return outcomes, {}
+
+            # Aggregated in-database increments: one row update per option and per poll.
+            # Rows are locked in key order, options then polls then rollups, like the direct
+            # path, so concurrent batches and single votes cannot deadlock on them
+            options_table, polls_table = Option.__table__, Poll.__table__
+            per_option = Counter(vote["option_id"] for vote in accepted)
+            per_poll = Counter(vote["poll_id"] for vote in accepted)
+            await db.execute(
+                update(options_table).where(options_table.c.id == bindparam("option_key")).values(
+                    vote_count=options_table.c.vote_count + bindparam("increment")
+                ),
+                [{"option_key": option_id, "increment": n} for option_id, n in sorted(per_option.items())],
+            )
+            await db.execute(
+                update(polls_table).where(polls_table.c.id == bindparam("poll_key")).values(
+                    total_votes=polls_table.c.total_votes + bindparam("increment"),
+                    version=polls_table.c.version + 1,
+                ),
+                [{"poll_key": poll_id, "increment": n} for poll_id, n in sorted(per_poll.items())],
+            )
+            await record_votes(db, [(vote["poll_id"], vote["option_id"], vote["created_at"]) for vote in accepted])
+
+            # Counts as of this batch, for the broadcasts
+            options_by_poll: Dict[UUID, List[Tuple[UUID, str, int]]] = defaultdict(list)
+            for option_id, poll_id, text, vote_count in (await db.execute(
+                select(Option.id, Option.poll_id, Option.text, Option.vote_count).where(Option.poll_id.in_(per_poll))
+            )).all():
+                options_by_poll[poll_id].append((option_id, text, vote_count))
+
+            await db.commit()
+        return outcomes, options_by_poll
+
+# Global ingestion queue (per worker); started by the app lifespan when enabled
+vote_ingest = VoteIngestQueue(
+    enabled=os.getenv("VOTE_GROUP_COMMIT", "").lower() in ("1", "true", "yes"),
+    batch_size=int(os.getenv("VOTE_BATCH_SIZE", 200)),
+    max_wait=float(os.getenv("VOTE_BATCH_MAX_WAIT_MS", 5)) / 1000,
+    max_queue=int(os.getenv("VOTE_QUEUE_MAX", 10_000)),
+)
@@ -0,0 +1,111 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database
+Tests run from backend/ with `python -m pytest`; DATABASE_URL is pointed at a temporary
+file before any app module is imported.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+from datetime import timezone
+
+_db_dir = tempfile.mkdtemp(prefix="quickpoll-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.sqlite.base import DATETIME as SQLITE_DATETIME
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    # Models use the PostgreSQL UUID type; SQLAlchemy stores its values as 32 hex chars on SQLite
+    return "CHAR(32)"
+
+_sqlite_datetime_result = SQLITE_DATETIME.result_processor
+
+def _aware_sqlite_datetime_result(self, dialect, coltype):
+    # PostgreSQL returns timestamptz columns as aware datetimes; SQLite drops the zone
+    process = _sqlite_datetime_result(self, dialect, coltype)
+    def aware(value):
+        value = process(value) if process else value
+        if value is not None and self.timezone and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+    return aware
+
+SQLITE_DATETIME.result_processor = _aware_sqlite_datetime_result
+
+import main
+from models import Option, Poll, Vote
+from models.database import AsyncSessionLocal, async_engine
+from services.rollups import record_votes
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture
+def statements():
+    """Count of SQL statements the request handlers send, reset with statements.clear()"""
+    counter = StatementCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+def register(client, name: str = None) -> dict:
+    """Register a fresh user; returns the Authorization header"""
+    name = name or f"user{uuid.uuid4().hex[:8]}"
+    response = client.post("/api/auth/register", json={"email": f"{name}@example.com", "username": name, "password": "secret12"})
+    assert response.status_code in (200, 201), response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def create_poll(client, headers: dict, title: str, n_options: int = 3) -> dict:
+    response = client.post(
+        "/api/polls",
+        json={"title": title, "options": [{"text": f"Option {i}"} for i in range(n_options)]},
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def add_votes(client, poll: dict, votes: list, created_at=None):
+    """Write (option index, created_at) votes the way submit_vote does: rows, counters, rollups.
+
+    created_at, if given, backdates the poll so the votes fall inside its lifetime.
+    """
+    poll_id = uuid.UUID(poll["id"])
+    option_ids = [uuid.UUID(option["id"]) for option in poll["options"]]
+
+    async def write():
+        async with AsyncSessionLocal() as db:
+            rows = [
+                Vote(poll_id=poll_id, option_id=option_ids[i], client_session_id=f"seed-{uuid.uuid4().hex}", created_at=at)
+                for i, at in votes
+            ]
+            db.add_all(rows)
+            for row in rows:
+                await db.execute(update(Option).where(Option.id == row.option_id).values(vote_count=Option.vote_count + 1))
+            await db.execute(update(Poll).where(Poll.id == poll_id).values(total_votes=Poll.total_votes + len(rows), version=Poll.version + 1))
+            if created_at is not None:
+                await db.execute(update(Poll).where(Poll.id == poll_id).values(created_at=created_at))
+            await record_votes(db, [(row.poll_id, row.option_id, row.created_at) for row in rows])
+            await db.commit()
+    client.portal.call(write)
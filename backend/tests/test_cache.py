@@ -0,0 +1,53 @@
+"""
+Generation counters read from Redis must not be cached locally past a bump
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cache import CacheManager
+
+KEY = "polls:list:generation"
+
+class BumpedDuringRead:
+    """Redis stand-in whose first GET is answered just before another worker bumps the counter"""
+
+    def __init__(self, cache: CacheManager):
+        self.cache = cache
+        self.value = 4
+        self.bumped = False
+
+    def get(self, key):
+        value = self.value
+        if not self.bumped:
+            self.bumped = True
+            self.value += 1
+            # The bump's invalidation reaches this worker before the read returns
+            self.cache._drop_local(key)
+        return str(value)
+
+    async def aget(self, key):
+        return self.get(key)
+
+@pytest.fixture
+def manager():
+    manager = CacheManager()
+    manager.enabled = True
+    redis = BumpedDuringRead(manager)
+    manager.async_client = SimpleNamespace(get=redis.aget)
+    manager.redis_client = SimpleNamespace(get=redis.get)
+    return manager
+
+def test_async_read_racing_a_bump_is_not_cached(manager):
+    assert asyncio.run(manager.aget_generation(KEY)) == 4
+    assert manager.local.get(KEY) is None
+    assert asyncio.run(manager.aget_generation(KEY)) == 5
+    assert manager.local.get(KEY) == 5
+
+def test_sync_read_racing_a_bump_is_not_cached(manager):
+    assert manager.get_generation(KEY) == 4
+    assert manager.local.get(KEY) is None
+    assert manager.get_generation(KEY) == 5
+    assert manager.local.get(KEY) == 5
@@ -0,0 +1,62 @@
+"""
+get_poll must load a poll in exactly two statements for every kind of caller
+"""
+
+import json
+from uuid import UUID
+
+import pytest
+
+from auth.auth import decode_token
+from conftest import create_poll, register
+from models import User
+from models.database import AsyncSessionLocal
+from routers.polls import get_poll
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    """A tagged poll the user and the session have both voted on and bookmarked"""
+    author = register(client)
+    user = register(client)
+    tag = client.post("/api/tags", json={"name": "get-poll-tag"}, headers=author).json()
+    poll = client.post(
+        "/api/polls",
+        json={"title": "get poll", "options": [{"text": "a"}, {"text": "b"}], "tag_ids": [tag["id"]]},
+        headers=author,
+    ).json()
+    option_id = poll["options"][0]["id"]
+    for headers in (user, {"X-Session-Id": "get-poll-session"}):
+        assert client.post(f"/api/polls/{poll['id']}/vote", json={"option_id": option_id}, headers=headers).status_code == 200
+        assert client.post(f"/api/polls/{poll['id']}/bookmark", headers=headers).status_code == 200
+    user_id = UUID(decode_token(user["Authorization"].split()[1])["sub"])
+    return {"poll_id": UUID(poll["id"]), "user_id": user_id, "untouched": UUID(create_poll(client, author, "untouched", n_options=2)["id"])}
+
+def call_get_poll(client, statements, poll_id, user_id=None, session_id=None, if_none_match=None):
+    """(response, statements issued by get_poll itself), run on the app's event loop"""
+    async def request():
+        async with AsyncSessionLocal() as db:
+            current_user = await db.get(User, user_id) if user_id else None
+            statements.clear()
+            response = await get_poll(poll_id=poll_id, db=db, current_user=current_user, session_id=session_id, if_none_match=if_none_match)
+            return response, statements.count
+    return client.portal.call(request)
+
+@pytest.mark.parametrize("caller", ["anonymous", "session", "user"])
+def test_two_statements_per_caller(client, seeded, statements, caller):
+    user_id = seeded["user_id"] if caller == "user" else None
+    session_id = "get-poll-session" if caller == "session" else None
+    for poll_id, interacted in ((seeded["poll_id"], caller != "anonymous"), (seeded["untouched"], False)):
+        response, count = call_get_poll(client, statements, poll_id, user_id, session_id)
+        assert count == 2
+        body = json.loads(response.body)
+        assert body["user_has_voted"] is interacted
+        assert body["user_has_bookmarked"] is interacted
+        assert len(body["options"]) == 2
+
+def test_matching_etag_is_one_statement(client, seeded, statements):
+    response, _ = call_get_poll(client, statements, seeded["poll_id"], session_id="get-poll-session")
+    not_modified, count = call_get_poll(
+        client, statements, seeded["poll_id"], session_id="get-poll-session", if_none_match=response.headers["ETag"]
+    )
+    assert not_modified.status_code == 304
+    assert count == 1
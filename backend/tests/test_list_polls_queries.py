@@ -0,0 +1,59 @@
+"""
+list_polls must cost a fixed number of statements per page, whatever the page size
+"""
+
+import pytest
+
+import routers.polls
+from conftest import register
+
+PAGE_SIZES = [1, 5, 20]
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    """25 polls with tags and votes; the voter votes on and bookmarks every other poll"""
+    author = register(client)
+    voter = register(client)
+    tags = [client.post("/api/tags", json={"name": f"list-tag-{i}"}, headers=author).json() for i in range(2)]
+    for i in range(25):
+        response = client.post(
+            "/api/polls",
+            json={"title": f"list poll {i}", "options": [{"text": "a"}, {"text": "b"}, {"text": "c"}], "tag_ids": [tag["id"] for tag in tags]},
+            headers=author,
+        )
+        assert response.status_code == 201, response.text
+        poll = response.json()
+        if i % 2 == 0:
+            option_id = poll["options"][i % 3]["id"]
+            assert client.post(f"/api/polls/{poll['id']}/vote", json={"option_id": option_id}, headers=voter).status_code == 200
+            assert client.post(f"/api/polls/{poll['id']}/vote", json={"option_id": option_id}, headers={"X-Session-Id": "list-session"}).status_code == 200
+            assert client.post(f"/api/polls/{poll['id']}/bookmark", headers=voter).status_code == 200
+    callers = {"anonymous": {}, "session": {"X-Session-Id": "list-session"}, "user": voter}
+    return {"callers": callers, "tag": tags[0]["slug"]}
+
+@pytest.fixture(autouse=True)
+def uncached_pages(monkeypatch):
+    # Every request builds its page from the database
+    async def no_generation(key):
+        return None
+    monkeypatch.setattr(routers.polls.cache, "aget_generation", no_generation)
+
+@pytest.mark.parametrize("caller", ["anonymous", "session", "user"])
+@pytest.mark.parametrize("sort", ["newest", "most_voted"])
+def test_statements_do_not_grow_with_page_size(client, seeded, statements, caller, sort):
+    counts = {}
+    for limit in PAGE_SIZES:
+        statements.clear()
+        response = client.get(f"/api/polls?limit={limit}&sort={sort}", headers=seeded["callers"][caller])
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) == limit
+        assert all(len(poll["tags"]) == 2 for poll in page if poll["title"].startswith("list poll"))
+        counts[limit] = statements.count
+    assert len(set(counts.values())) == 1, counts
+
+def test_user_flags_are_per_poll(client, seeded):
+    page = client.get(f"/api/polls?limit=20&sort=oldest&tag={seeded['tag']}", headers=seeded["callers"]["user"]).json()
+    voted = [poll["user_has_voted"] for poll in page]
+    bookmarked = [poll["user_has_bookmarked"] for poll in page]
+    assert voted == bookmarked == [i % 2 == 0 for i in range(20)]
@@ -0,0 +1,44 @@
+"""
+PostgreSQL searches fall back to ILIKE when to_tsquery() keeps no terms
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from models import Poll
+from services.search import apply_search
+
+class PostgresSession:
+    """Just enough of an AsyncSession on PostgreSQL for apply_search"""
+
+    def __init__(self, numnode: int):
+        self.numnode = numnode
+        self.statements = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=postgresql.dialect())
+
+    async def scalar(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.numnode
+
+def search(search_text: str, numnode: int):
+    db = PostgresSession(numnode)
+    query, relevance = asyncio.run(apply_search(db, select(Poll), search_text))
+    return str(query.compile(dialect=postgresql.dialect())), relevance, db.statements
+
+def test_stop_words_only_falls_back_to_ilike():
+    sql, relevance, statements = search("the", numnode=0)
+    assert relevance is None
+    assert "ILIKE" in sql and "@@" not in sql
+    assert ["numnode(to_tsquery" in statement for statement in statements] == [True]
+
+@pytest.mark.parametrize("search_text", ["python", "the python"])
+def test_terms_left_after_stop_words_use_the_index(search_text):
+    sql, relevance, _ = search(search_text, numnode=1)
+    assert relevance is not None
+    assert "@@" in sql and "ILIKE" not in sql
@@ -0,0 +1,83 @@
+"""
+Timeseries data sources must agree with the raw votes at the requested sample times
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import add_votes, create_poll, register
+from routers.polls import _negotiate_timeseries_format
+from services.rollups import bucket_floor
+
+def iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+@pytest.fixture(scope="module")
+def author(client):
+    return register(client)
+
+def final_counts(client, poll: dict, query: str) -> list:
+    response = client.get(f"/api/polls/{poll['id']}/timeseries?metric=count&{query}")
+    assert response.status_code == 200, response.text
+    return [series["data"][-1]["y"] for series in response.json()["series"]]
+
+@pytest.mark.parametrize("source", ["rollup", "sql"])
+def test_past_range_ignores_votes_after_to(client, author, source):
+    now = datetime.now(timezone.utc)
+    created = now - timedelta(hours=30)
+    # Mid-hour and mid-minute, so the hour and minute holding `to` both end after it
+    to = bucket_floor(now - timedelta(hours=3), 3600) + timedelta(minutes=20, seconds=30)
+    poll = create_poll(client, author, f"clipped {source}", n_options=2)
+    add_votes(client, poll, [
+        (0, created + timedelta(minutes=5)),
+        (1, to - timedelta(hours=2)),
+        (0, to - timedelta(minutes=7)),
+        (1, to - timedelta(seconds=20)),
+        (0, to),
+        (1, to + timedelta(seconds=10)),
+        (0, to + timedelta(minutes=5)),
+        (1, to + timedelta(minutes=30)),
+    ], created_at=created)
+    assert final_counts(client, poll, f"points=10&source={source}&to={iso(to)}") == [3.0, 2.0]
+
+def test_young_poll_sparkline_counts_votes_when_cast(client, author):
+    now = datetime.now(timezone.utc)
+    # Under 40 minutes old, so sparkline samples are less than a minute apart
+    voted = bucket_floor(now - timedelta(minutes=5), 60) + timedelta(seconds=50)
+    poll = create_poll(client, author, "young sparkline", n_options=2)
+    add_votes(client, poll, [(1, voted)], created_at=now - timedelta(minutes=10))
+    response = client.get(f"/api/polls/sparklines?ids={poll['id']}&points=40&metric=count")
+    assert response.status_code == 200, response.text
+    data = response.json()[poll["id"]]["series"][1]["data"]
+    assert data[-1]["y"] == 1.0
+    # Minute rollups would date the vote to the start of its minute, 50s early
+    assert all(datetime.fromisoformat(point["x"]) >= voted for point in data if point["y"])
+
+def test_sql_counts_votes_at_a_sample_in_that_sample(client, author):
+    start = bucket_floor(datetime.now(timezone.utc) - timedelta(hours=2), 60)
+    at = [start + timedelta(seconds=90 * i) for i in range(10)]
+    poll = create_poll(client, author, "sample boundaries", n_options=2)
+    add_votes(client, poll, [
+        (0, at[0]),
+        (0, at[3]),
+        (1, at[3] + timedelta(seconds=1)),
+        (1, at[9]),
+    ], created_at=start - timedelta(minutes=1))
+    response = client.get(f"/api/polls/{poll['id']}/timeseries?metric=count&points=10&source=sql&from={iso(at[0])}&to={iso(at[9])}")
+    assert response.status_code == 200, response.text
+    counts = [[point["y"] for point in series["data"]] for series in response.json()["series"]]
+    assert counts[0] == [1.0, 1.0, 1.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0]
+    assert counts[1] == [0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, 2.0]
+
+@pytest.mark.parametrize("accept, fmt", [
+    (None, "series"),
+    ("*/*", "series"),
+    ("application/octet-stream", "binary"),
+    ("application/octet-stream;q=0, */*", "series"),
+    ("application/json;q=0.5, application/vnd.quickpoll.columnar+json", "columnar"),
+    ("application/vnd.quickpoll.columnar+json;q=0.4, application/octet-stream; q=0.8", "binary"),
+    ("application/octet-stream;q=0.8, application/json;q=0.8", "series"),
+])
+def test_accept_header_picks_highest_q(accept, fmt):
+    assert _negotiate_timeseries_format(accept) == fmt
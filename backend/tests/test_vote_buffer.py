@@ -0,0 +1,60 @@
+"""
+Vote buffers must track the database: topped up when other workers take votes, and
+registered with every vote published while they load
+"""
+
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+
+from conftest import add_votes, create_poll, register
+from models.database import AsyncSessionLocal
+from services.vote_buffer import VoteEventBuffers
+
+@pytest.fixture
+def buffers():
+    return VoteEventBuffers(max_bytes=1 << 20, max_events_per_poll=1000, max_age=300)
+
+@pytest.fixture
+def poll(client):
+    poll = create_poll(client, register(client), "buffered", n_options=2)
+    poll["option_ids"] = [option["id"] for option in poll["options"]]
+    return poll
+
+def get_buffer(client, buffers, poll, expected_votes):
+    async def get():
+        async with AsyncSessionLocal() as db:
+            return await buffers.get(db, UUID(poll["id"]), poll["option_ids"], expected_votes)
+    return client.portal.call(get)
+
+def test_short_buffer_is_topped_up(client, buffers, poll):
+    now = datetime.now(timezone.utc)
+    add_votes(client, poll, [(0, now - timedelta(minutes=3)), (1, now - timedelta(minutes=2))])
+    buffer = get_buffer(client, buffers, poll, 2)
+    assert len(buffer) == 2 and buffers.warms == 1
+
+    # Taken by another worker: in the database, never published to this one
+    add_votes(client, poll, [(1, now - timedelta(minutes=1)), (0, now)])
+    topped_up = get_buffer(client, buffers, poll, 4)
+    assert topped_up is buffer
+    assert sorted(buffer.options) == [0, 0, 1, 1]
+    assert (buffers.warms, buffers.top_ups) == (1, 1)
+
+def test_votes_published_during_a_warm_are_kept(client, buffers, poll, monkeypatch):
+    now = datetime.now(timezone.utc)
+    add_votes(client, poll, [(0, now - timedelta(minutes=2)), (1, now - timedelta(minutes=1))])
+    poll_id = UUID(poll["id"])
+    load = VoteEventBuffers._load
+
+    async def racing_load(db, poll_id_, *criteria):
+        rows = await load(db, poll_id_, *criteria)
+        # One vote the snapshot already holds, and one committed just after it
+        buffers.append(poll_id, now - timedelta(minutes=1), UUID(poll["option_ids"][1]))
+        buffers.append(poll_id, now, UUID(poll["option_ids"][0]))
+        return rows
+    monkeypatch.setattr(buffers, "_load", racing_load)
+
+    buffer = get_buffer(client, buffers, poll, 2)
+    assert sorted(buffer.options) == [0, 0, 1]
+    assert buffers.stats()["polls"] == 1
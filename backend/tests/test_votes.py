@@ -0,0 +1,61 @@
+"""
+submit_vote must reject duplicate votes, closed polls and foreign options without
+moving any counter
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from conftest import create_poll, register
+from models import Poll
+from models.database import AsyncSessionLocal
+from routers.votes import _write_vote_postgresql
+
+@pytest.fixture
+def poll(client):
+    return create_poll(client, register(client), "vote rejections", n_options=2)
+
+def vote(client, poll: dict, option_id: str, session: str):
+    return client.post(f"/api/polls/{poll['id']}/vote", json={"option_id": option_id}, headers={"X-Session-Id": session})
+
+def counts(client, poll: dict) -> tuple:
+    body = client.get(f"/api/polls/{poll['id']}").json()
+    return body["total_votes"], [option["vote_count"] for option in body["options"]]
+
+def test_duplicate_vote_is_rejected(client, poll):
+    assert vote(client, poll, poll["options"][0]["id"], "dup-session").status_code == 200
+    response = vote(client, poll, poll["options"][1]["id"], "dup-session")
+    assert (response.status_code, response.json()["detail"]) == (400, "You have already voted on this poll")
+    assert counts(client, poll) == (1, [1, 0])
+
+def test_vote_on_expired_poll_is_rejected(client, poll):
+    async def expire():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Poll).where(Poll.id == uuid.UUID(poll["id"])).values(
+                expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)
+            ))
+            await db.commit()
+    client.portal.call(expire)
+    response = vote(client, poll, poll["options"][0]["id"], "late-session")
+    assert (response.status_code, response.json()["detail"]) == (400, "Poll has expired")
+    assert counts(client, poll) == (0, [0, 0])
+
+def test_vote_for_another_polls_option_is_rejected(client, poll):
+    other = create_poll(client, register(client), "other poll", n_options=2)
+    for option_id in (other["options"][0]["id"], str(uuid.uuid4())):
+        response = vote(client, poll, option_id, "stray-session")
+        assert (response.status_code, response.json()["detail"]) == (404, "Option not found in this poll")
+    assert counts(client, poll) == (0, [0, 0])
+
+def test_postgresql_write_is_one_statement():
+    now = datetime.now(timezone.utc)
+    row = {"id": uuid.uuid4(), "poll_id": uuid.uuid4(), "option_id": uuid.uuid4(), "user_id": None, "client_session_id": "s", "created_at": now}
+    sql = str(_write_vote_postgresql(row, now).compile(dialect=asyncpg_dialect()))
+    assert sql.startswith("WITH inserted AS")
+    for cte in ("bumped_option AS", "bumped_poll AS", "rolled_up AS"):
+        assert cte in sql
+    assert sql.count("RETURNING") == 3
@@ -1,20 +1,79 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from uuid import UUID
+from datetime import datetime, timezone
+import json
 
 from models import get_db, Poll
-from .manager import manager
+from .manager import manager, TimeseriesSubscription, MIN_TIMESERIES_STEP, MAX_TIMESERIES_STEP
 
 router = APIRouter()
 
+async def _subscribe_timeseries(websocket: WebSocket, poll_id: str, db: AsyncSession, message: dict) -> dict:
+    """Register a timeseries subscription and return the acknowledgement.
+
+    Message: { type: "subscribe_timeseries", step: seconds, metric: "count"|"percent",
+               since?: ISO timestamp of the client's last sample point }
+    """
+    poll = await db.scalar(select(Poll).options(selectinload(Poll.options)).where(Poll.id == UUID(poll_id)))
+    # Hand the connection back to the pool; the socket may stay open for hours
+    await db.close()
+    if not poll:
+        return {"type": "error", "message": "Poll not found"}
+    try:
+        step = float(message.get("step", 60))
+    except (TypeError, ValueError):
+        return {"type": "error", "message": "Invalid step"}
+    # json.loads accepts NaN and Infinity, which fail every comparison
+    if not MIN_TIMESERIES_STEP <= step <= MAX_TIMESERIES_STEP:
+        return {"type": "error", "message": f"step must be between {MIN_TIMESERIES_STEP} and {MAX_TIMESERIES_STEP} seconds"}
+    metric = message.get("metric", "percent")
+    if metric not in ("percent", "count"):
+        return {"type": "error", "message": "metric must be 'percent' or 'count'"}
+
+    # The grid continues from the client's last point so deltas line up with its chart
+    now = datetime.now(timezone.utc).timestamp()
+    next_sample = now
+    if message.get("since"):
+        try:
+            since = datetime.fromisoformat(str(message["since"]).replace('Z', '+00:00'))
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            next_sample = since.timestamp() + step
+        except (ValueError, OverflowError):
+            return {"type": "error", "message": "Invalid timestamp format; use ISO 8601"}
+        if next_sample > now + step:
+            return {"type": "error", "message": "since must not be in the future"}
+
+    options = poll.options
+    subscription = TimeseriesSubscription(
+        option_ids=[str(opt.id) for opt in options],
+        counts=[opt.vote_count or 0 for opt in options],
+        step=step,
+        metric=metric,
+        next_sample=next_sample,
+    )
+    manager.subscribe_timeseries(websocket, poll_id, subscription)
+    return {
+        "type": "timeseries_subscribed",
+        "poll_id": poll_id,
+        "options": [{"id": str(opt.id), "label": opt.text} for opt in options],
+        "step": step,
+        "metric": metric,
+        "next": datetime.fromtimestamp(next_sample, tz=timezone.utc).isoformat(),
+    }
+
 @router.websocket("/ws/{poll_id}")
-async def websocket_endpoint(websocket: WebSocket, poll_id: str, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, poll_id: str, db: AsyncSession = Depends(get_db)):
     """WebSocket endpoint for real-time poll updates"""
     # Allow a global channel 'all' for list pages; otherwise verify poll exists
     if poll_id != 'all':
         try:
             poll_uuid = UUID(poll_id)
-            poll = db.query(Poll).filter(Poll.id == poll_uuid).first()
+            poll = await db.get(Poll, poll_uuid)
+            await db.close()
             if not poll:
                 await websocket.close(code=1008, reason="Poll not found")
                 return
@@ -28,12 +87,23 @@ async def websocket_endpoint(websocket: WebSocket, poll_id: str, db: Session = D
     try:
         # Keep connection alive and listen for messages
         while True:
-            # Receive messages (ping/pong for keep-alive)
+            # Receive messages (ping/pong for keep-alive, timeseries subscriptions)
             data = await websocket.receive_text()
-            # Echo back to confirm connection is alive
-            await websocket.send_json({"type": "pong", "message": "Connection alive"})
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            message_type = message.get("type") if isinstance(message, dict) else None
+            
+            if message_type == "subscribe_timeseries" and poll_id != 'all':
+                await websocket.send_json(await _subscribe_timeseries(websocket, poll_id, db, message))
+            elif message_type == "unsubscribe_timeseries":
+                manager.unsubscribe_timeseries(websocket, poll_id)
+                await websocket.send_json({"type": "timeseries_unsubscribed", "poll_id": poll_id})
+            else:
+                # Echo back to confirm connection is alive
+                await websocket.send_json({"type": "pong", "message": "Connection alive"})
     except WebSocketDisconnect:
         manager.disconnect(websocket, poll_id)
     except Exception as e:
         manager.disconnect(websocket, poll_id)
-
@@ -1,11 +1,61 @@
-from typing import Dict, Set
+from typing import Dict, Set, List, Any
+from datetime import datetime, timezone
 from fastapi import WebSocket
 import json
 
+# Closed points pushed in one delta before asking the client to refetch instead
+MAX_DELTA_POINTS = 200
+# Accepted sample steps for timeseries subscriptions, in seconds
+MIN_TIMESERIES_STEP = 1
+MAX_TIMESERIES_STEP = 86400
+
+class TimeseriesSubscription:
+    """Fixed-step sample grid for one client; tracks which sample is still open"""
+    
+    def __init__(self, option_ids: List[str], counts: List[int], step: float, metric: str, next_sample: float):
+        self.option_ids = option_ids
+        self.counts = counts  # Cumulative counts as of the last vote seen
+        self.step = step
+        self.metric = metric
+        self.next_sample = next_sample  # Epoch of the first sample not yet closed
+    
+    def _values(self, counts: List[int]) -> List[float]:
+        if self.metric == "percent":
+            total = sum(counts)
+            return [round(c / total * 100.0, 4) if total > 0 else 0.0 for c in counts]
+        return [float(c) for c in counts]
+    
+    def _point(self, epoch: float, counts: List[int]) -> Dict[str, Any]:
+        return {"x": datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat(), "y": self._values(counts)}
+    
+    def on_vote(self, options: List[dict], voted_at: float) -> Dict[str, Any]:
+        """Delta message for a vote: samples closed since the last vote, then the open sample"""
+        by_id = {opt["id"]: opt["vote_count"] for opt in options}
+        new_counts = [by_id.get(opt_id, 0) for opt_id in self.option_ids]
+        
+        # Samples strictly before this vote closed with the previous counts
+        closed = []
+        while self.next_sample < voted_at:
+            if len(closed) >= MAX_DELTA_POINTS:
+                self.counts = new_counts
+                self.next_sample = voted_at
+                return {"type": "timeseries_reset"}
+            closed.append(self._point(self.next_sample, self.counts))
+            self.next_sample += self.step
+        
+        self.counts = new_counts
+        return {
+            "type": "timeseries_delta",
+            "closed": closed,
+            "last": self._point(self.next_sample, new_counts),
+        }
+
 class ConnectionManager:
     def __init__(self):
         # Map poll_id to set of active WebSocket connections
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Map poll_id to the connections subscribed to timeseries deltas
+        self.timeseries_subscriptions: Dict[str, Dict[WebSocket, TimeseriesSubscription]] = {}
     
     async def connect(self, websocket: WebSocket, poll_id: str):
         """Connect a client to a specific poll's WebSocket"""
@@ -20,6 +70,36 @@ class ConnectionManager:
             self.active_connections[poll_id].discard(websocket)
             if not self.active_connections[poll_id]:
                 del self.active_connections[poll_id]
+        self.unsubscribe_timeseries(websocket, poll_id)
+    
+    def subscribe_timeseries(self, websocket: WebSocket, poll_id: str, subscription: TimeseriesSubscription):
+        """Start pushing timeseries deltas for a poll to this client"""
+        self.timeseries_subscriptions.setdefault(poll_id, {})[websocket] = subscription
+    
+    def unsubscribe_timeseries(self, websocket: WebSocket, poll_id: str):
+        subscribers = self.timeseries_subscriptions.get(poll_id)
+        if subscribers is not None:
+            subscribers.pop(websocket, None)
+            if not subscribers:
+                del self.timeseries_subscriptions[poll_id]
+    
+    async def push_timeseries(self, poll_id: str, options: List[dict], voted_at: datetime):
+        """Send each timeseries subscriber only the sample points changed by a vote"""
+        subscribers = self.timeseries_subscriptions.get(poll_id)
+        if not subscribers:
+            return
+        voted_epoch = voted_at.replace(tzinfo=voted_at.tzinfo or timezone.utc).timestamp()
+        disconnected = set()
+        for connection, subscription in list(subscribers.items()):
+            # A subscriber that cannot be served is dropped; the vote is already committed
+            try:
+                message = subscription.on_vote(options, voted_epoch)
+                message["poll_id"] = poll_id
+                await connection.send_json(message)
+            except:
+                disconnected.add(connection)
+        for connection in disconnected:
+            self.unsubscribe_timeseries(connection, poll_id)
     
     async def broadcast_to_poll(self, poll_id: str, message: dict):
         """Broadcast a message to all clients connected to a specific poll"""
@@ -1,22 +1,23 @@
 'use client';
 
-import { useEffect, useMemo, useState } from 'react';
-import api from '@/lib/api';
+import { useMemo } from 'react';
 import { ResponsiveLine } from '@nivo/line';
 
-interface Props { pollId: string }
+export interface TrendSeries {
+  id: string;
+  data: { x: string; y: number }[];
+}
+
+// One batch request for a whole list page; see PollList
+export const TREND_POINTS = 40;
 
-export function MiniTrend({ pollId }: Props) {
-  const [data, setData] = useState<{ id: string; data: { x: any; y: number }[] }[]>([]);
+interface Props { series: TrendSeries[] }
 
-  useEffect(() => {
-    const load = async () => {
-      const res = await api.get(`/api/polls/${pollId}/timeseries?points=40&metric=percent`);
-      const series = (res.data.series || []).map((s: any) => ({ id: s.id, data: (s.data || []).map((p: any) => ({ x: new Date(p.x), y: p.y })) }));
-      setData(series);
-    };
-    load().catch(() => {});
-  }, [pollId]);
+export function MiniTrend({ series }: Props) {
+  const data = useMemo(
+    () => series.map((s) => ({ id: s.id, data: (s.data || []).map((p) => ({ x: new Date(p.x), y: p.y })) })),
+    [series]
+  );
 
   const theme = useMemo(() => ({
     textColor: 'transparent', grid: { line: { opacity: 0 } }, axis: { ticks: { text: { fill: 'transparent' } } }
@@ -43,6 +44,3 @@ export function MiniTrend({ pollId }: Props) {
     />
   );
 }
-
-
-
@@ -6,6 +6,7 @@ import { Badge } from '@/components/ui/badge';
 import { Bookmark, MessageSquare, Clock, Radio, Trash2, BookmarkMinus, Tag as TagIcon } from 'lucide-react';
 import { formatDistanceToNow, isPast, formatDistanceToNowStrict } from 'date-fns';
 import { CountdownTimer } from '@/components/CountdownTimer';
+import { MiniTrend, TrendSeries } from '@/components/MiniTrend';
 import { useAuthStore } from '@/store/authStore';
 import api from '@/lib/api';
 import { toast } from 'sonner';
@@ -40,11 +41,12 @@ interface PollCardProps {
     user_has_bookmarked?: boolean;
     tags?: Tag[];
   };
+  trend?: TrendSeries[];
   context?: 'default' | 'bookmarks';
   onDelete?: () => void;
 }
 
-export function PollCard({ poll, context = 'default', onDelete }: PollCardProps) {
+export function PollCard({ poll, trend, context = 'default', onDelete }: PollCardProps) {
   const isExpired = poll.expires_at && isPast(new Date(poll.expires_at));
   const hasExpiration = !!poll.expires_at;
   const { user } = useAuthStore();
@@ -201,6 +203,13 @@ export function PollCard({ poll, context = 'default', onDelete }: PollCardProps)
             </div>
           ) : null}
 
+          {/* Vote share over the poll's lifetime, loaded for the whole list by PollList */}
+          {trend && trend.length > 0 && poll.total_votes > 0 && (
+            <div className="h-12 w-full">
+              <MiniTrend series={trend} />
+            </div>
+          )}
+
           {/* Tags */}
           {poll.tags && poll.tags.length > 0 && (
             <div className="flex flex-wrap gap-2 pt-2">
@@ -1,8 +1,13 @@
  'use client';
 
 import { PollCard } from './PollCard';
-import { useEffect, useState } from 'react';
+import { TREND_POINTS, TrendSeries } from './MiniTrend';
+import { useEffect, useMemo, useState } from 'react';
 import { useWebSocket } from '@/hooks/useWebSocket';
+import api from '@/lib/api';
+
+// The sparklines endpoint accepts at most this many ids per request
+const SPARKLINE_BATCH = 100;
 
 interface PollOption {
   id: string;
@@ -31,10 +36,38 @@ interface PollListProps {
 
 export function PollList({ polls, context = 'default', onPollDeleted }: PollListProps) {
   const [localPolls, setLocalPolls] = useState<Poll[]>(polls);
+  const [trends, setTrends] = useState<Record<string, TrendSeries[]>>({});
   const { lastMessage } = useWebSocket('all');
 
   useEffect(() => setLocalPolls(polls), [polls]);
 
+  // Sparklines for the whole page in one request, refetched only when the set of polls changes
+  const pollIds = useMemo(() => polls.map((p) => p.id).join(','), [polls]);
+  useEffect(() => {
+    if (!pollIds) return;
+    let cancelled = false;
+    const ids = pollIds.split(',');
+    const requests = [];
+    for (let i = 0; i < ids.length; i += SPARKLINE_BATCH) {
+      const params = new URLSearchParams({ points: String(TREND_POINTS), metric: 'percent' });
+      ids.slice(i, i + SPARKLINE_BATCH).forEach((id) => params.append('ids', id));
+      requests.push(api.get(`/api/polls/sparklines?${params.toString()}`));
+    }
+    Promise.all(requests)
+      .then((responses) => {
+        if (cancelled) return;
+        const next: Record<string, TrendSeries[]> = {};
+        responses.forEach((res) => {
+          Object.entries(res.data || {}).forEach(([id, body]: [string, any]) => {
+            next[id] = body.series || [];
+          });
+        });
+        setTrends(next);
+      })
+      .catch(() => {});
+    return () => { cancelled = true; };
+  }, [pollIds]);
+
   useEffect(() => {
     if (!lastMessage) return;
     if (lastMessage.type === 'poll_deleted') {
@@ -63,7 +96,7 @@ export function PollList({ polls, context = 'default', onPollDeleted }: PollList
   return (
     <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
       {localPolls.map((poll) => (
-        <PollCard key={poll.id} poll={poll} context={context} onDelete={onPollDeleted} />
+        <PollCard key={poll.id} poll={poll} trend={trends[poll.id]} context={context} onDelete={onPollDeleted} />
       ))}
     </div>
   );